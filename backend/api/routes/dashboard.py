@@ -1,88 +1,92 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from core.database import get_db
-from models.order import Order, OrderStatus
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from core.database import get_async_db
+from core.pagination import summary_columns
+from models.order import DailySales
 from models.product import Product
 from models.user import User
+from services.dashboard_cache import DashboardCache, get_dashboard_cache
+from schemas.dashboard import DashboardStats, SalesChart, TopProducts
+from schemas.product import ProductSummary
 from datetime import datetime, timedelta
+from typing import Optional
 
 router = APIRouter()
 
-@router.get("/stats")
-def get_dashboard_stats(db: Session = Depends(get_db)):
+@router.get("/stats", response_model=DashboardStats)
+async def get_dashboard_stats(
+    db: AsyncSession = Depends(get_async_db),
+    cache: Optional[DashboardCache] = Depends(get_dashboard_cache)
+):
     """
     آمار داشبورد
+    یک query روی خلاصه روزانه (daily_sales)؛ هزینه با بزرگ شدن جدول سفارشات ثابت می‌ماند.
+    پاسخ تا تغییر بعدی سفارش، محصول یا کاربر از کش Redis برگردانده می‌شود.
     """
+    if cache is not None:
+        cached = await cache.get_stats()
+        if cached is not None:
+            return cached
+    
     today = datetime.utcnow().date()
     week_ago = today - timedelta(days=7)
-    month_ago = today - timedelta(days=30)
-    
-    # تعداد سفارشات امروز
-    today_orders = db.query(Order).filter(
-        func.date(Order.created_at) == today
-    ).count()
-    
-    # تعداد سفارشات هفته
-    week_orders = db.query(Order).filter(
-        Order.created_at >= week_ago
-    ).count()
-    
-    # فروش امروز
-    today_sales = db.query(func.sum(Order.total)).filter(
-        func.date(Order.created_at) == today,
-        Order.status != OrderStatus.CANCELLED
-    ).scalar() or 0
-    
-    # کمیسیون امروز
-    today_commission = db.query(func.sum(Order.commission_amount)).filter(
-        func.date(Order.created_at) == today,
-        Order.status != OrderStatus.CANCELLED
-    ).scalar() or 0
+    is_today = DailySales.day == today
     
-    # تعداد محصولات
-    total_products = db.query(Product).count()
+    row = (await db.execute(
+        select(
+            func.coalesce(func.sum(case((is_today, DailySales.orders), else_=0)), 0).label('today_orders'),
+            func.coalesce(func.sum(case((is_today, DailySales.sales), else_=0)), 0).label('today_sales'),
+            func.coalesce(func.sum(case((is_today, DailySales.commission), else_=0)), 0).label('today_commission'),
+            func.coalesce(func.sum(DailySales.orders), 0).label('week_orders'),
+            select(func.count(Product.id)).scalar_subquery().label('total_products'),
+            select(func.count(User.id)).scalar_subquery().label('total_users')
+        ).where(DailySales.day >= week_ago)
+    )).one()
     
-    # تعداد کاربران
-    total_users = db.query(User).count()
-    
-    return {
+    stats = {
         "today": {
-            "orders": today_orders,
-            "sales": today_sales,
-            "commission": today_commission
+            "orders": row.today_orders,
+            "sales": row.today_sales,
+            "commission": row.today_commission
         },
         "week": {
-            "orders": week_orders
+            "orders": row.week_orders
         },
         "totals": {
-            "products": total_products,
-            "users": total_users
+            "products": row.total_products,
+            "users": row.total_users
         }
     }
+    if cache is not None:
+        await cache.set_stats(stats)
+    return stats
 
-@router.get("/sales-chart")
-def get_sales_chart(
-    days: int = 7,
-    db: Session = Depends(get_db)
+@router.get("/sales-chart", response_model=SalesChart)
+async def get_sales_chart(
+    days: int = Query(7, ge=1, le=366),
+    platform: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    نمودار فروش
+    نمودار فروش (روزانه، اختیاری برای یک پلتفرم)
     """
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=days)
+    start_date = datetime.utcnow().date() - timedelta(days=days)
+    placed = func.sum(DailySales.orders - DailySales.cancelled_orders)
+    
+    query = select(
+        DailySales.day.label('date'),
+        func.sum(DailySales.sales).label('total'),
+        func.sum(DailySales.commission).label('commission'),
+        placed.label('orders')
+    ).where(DailySales.day >= start_date)
+    if platform:
+        query = query.where(DailySales.platform == platform)
     
-    daily_sales = db.query(
-        func.date(Order.created_at).label('date'),
-        func.sum(Order.total).label('total'),
-        func.sum(Order.commission_amount).label('commission'),
-        func.count(Order.id).label('orders')
-    ).filter(
-        Order.created_at >= start_date,
-        Order.status != OrderStatus.CANCELLED
-    ).group_by(
-        func.date(Order.created_at)
-    ).all()
+    daily_sales = (await db.execute(
+        query.group_by(DailySales.day).having(placed > 0).order_by(DailySales.day)
+    )).all()
     
     return {
         "labels": [str(s.date) for s in daily_sales],
@@ -91,16 +95,36 @@ def get_sales_chart(
         "orders": [s.orders for s in daily_sales]
     }
 
-@router.get("/top-products")
-def get_top_products(
-    limit: int = 10,
-    db: Session = Depends(get_db)
+@router.get("/top-products", response_model=TopProducts)
+async def get_top_products(
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    cache: Optional[DashboardCache] = Depends(get_dashboard_cache)
 ):
     """
     محصولات پرفروش
+    رتبه‌بندی از sorted set Redis (بدون مرتب‌سازی جدول محصولات)؛ فقط ردیف همان محصولات با کلید اصلی خوانده می‌شود.
     """
-    products = db.query(Product).order_by(
-        Product.sales_count.desc()
-    ).limit(limit).all()
+    summary = load_only(*summary_columns(Product, ProductSummary))
+    
+    async def load():
+        return (await db.execute(
+            select(Product.id, Product.sales_count).where(Product.sales_count > 0)
+        )).all()
+    
+    ids = await cache.top_product_ids(limit, load) if cache is not None else None
+    if ids is None:
+        products = (await db.scalars(
+            select(Product).options(summary).order_by(Product.sales_count.desc()).limit(limit)
+        )).all()
+        return {"products": products}
+    
+    ranked = (await db.scalars(select(Product).options(summary).where(Product.id.in_(ids)))).all() if ids else []
+    by_id = {product.id: product for product in ranked}
+    products = [by_id[product_id] for product_id in ids if product_id in by_id]
+    if len(products) < limit:
+        # محصولات بدون فروش (خارج از sorted set) برای پر کردن فهرست
+        query = select(Product).options(summary).where(func.coalesce(Product.sales_count, 0) == 0).limit(limit - len(products))
+        products += (await db.scalars(query)).all()
     
     return {"products": products}
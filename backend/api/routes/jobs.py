@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Query
+from core.config import settings
+from services.jobs import submit_job, job_status, cancel_job
+
+router = APIRouter()
+
+@router.post("/sync-vendors", status_code=202)
+def sync_vendors(priority: int = Query(settings.JOB_DEFAULT_PRIORITY, ge=0, le=9)):
+    """
+    ثبت job همگام‌سازی vendorها (سفارشات پنل‌ها و قیمت‌ها)
+    """
+    job = submit_job("control.sync_vendors", priority=priority)
+    return {"success": True, **job, "status_url": f"/api/jobs/{job['job_id']}"}
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    """
+    وضعیت job: QUEUED، STARTED، PROGRESS (با پیشرفت)، SUCCESS (با نتیجه)، FAILURE یا REVOKED
+    """
+    return job_status(job_id)
+
+@router.delete("/{job_id}")
+def delete_job(job_id: str):
+    """
+    لغو job (اگر هنوز شروع نشده باشد اجرا نمی‌شود)
+    """
+    return cancel_job(job_id)
@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from core.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
+from core.database import get_async_db
+from core.pagination import count_rows, keyset_page, summary_columns
 from models.order import Order, OrderItem, OrderStatus
+from services.sales_rollup import order_contribution, order_platform, rollup_statement, status_change_delta
+from models.product import Product
 from models.user import User
+from schemas.order import OrderCreated, OrderDetail, OrderPage, OrderStatusUpdated, OrderSummary, OrderTracking
+from services.dashboard_cache import DashboardCache, get_dashboard_cache
 from typing import List, Optional
 import random
 import string
@@ -13,17 +20,18 @@ def generate_order_number():
     """تولید شماره سفارش یکتا"""
     return 'DS-' + ''.join(random.choices(string.digits, k=8))
 
-@router.post("/create")
-def create_order(
+@router.post("/create", response_model=OrderCreated)
+async def create_order(
     user_id: int,
     items: List[dict],
     shipping_address: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    cache: Optional[DashboardCache] = Depends(get_dashboard_cache)
 ):
     """
     ایجاد سفارش جدید
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="کاربر یافت نشد")
     
@@ -47,11 +55,13 @@ def create_order(
         total=total,
         commission_amount=commission_total,
         shipping_address=shipping_address,
-        status=OrderStatus.PENDING
+        status=OrderStatus.PENDING,
+        fulfilled_by=order_platform(item.get('platform') for item in items)
     )
     
     db.add(order)
-    db.flush()
+    await db.flush()
+    await db.execute(rollup_statement(db, order, order_contribution(order)))
     
     # اضافه کردن آیتم‌ها
     for item_data in items:
@@ -67,8 +77,23 @@ def create_order(
         )
         db.add(order_item)
     
-    db.commit()
-    db.refresh(order)
+    # تعداد فروش محصولات (منبع رتبه‌بندی پرفروش‌ها)
+    quantities = {}
+    for item_data in items:
+        if item_data.get('product_id'):
+            quantities[item_data['product_id']] = quantities.get(item_data['product_id'], 0) + item_data['quantity']
+    if quantities:
+        products = Product.__table__
+        await db.execute(
+            update(products)
+            .where(products.c.id == bindparam('pid'))
+            .values(sales_count=func.coalesce(products.c.sales_count, 0) + bindparam('sold')),
+            [{"pid": product_id, "sold": quantity} for product_id, quantity in quantities.items()]
+        )
+    
+    await db.commit()
+    if cache is not None:
+        await cache.record_sales(quantities)
     
     return {
         "success": True,
@@ -78,84 +103,95 @@ def create_order(
         "commission": commission_total
     }
 
-@router.get("/")
-def get_orders(
+@router.get("/", response_model=OrderPage)
+async def get_orders(
     user_id: Optional[int] = None,
     status: Optional[OrderStatus] = None,
-    skip: int = 0,
-    limit: int = 50,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    count: str = Query("none", pattern="^(none|exact|estimated)$"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    دریافت لیست سفارشات
+    دریافت لیست سفارشات (جدیدترین اول)
+    صفحه بعد با next_cursor؛ تعداد کل فقط با count=exact یا count=estimated
     """
-    query = db.query(Order)
+    query = select(Order).options(load_only(*summary_columns(Order, OrderSummary)))
     
     if user_id:
-        query = query.filter(Order.user_id == user_id)
+        query = query.where(Order.user_id == user_id)
     
     if status:
-        query = query.filter(Order.status == status)
+        query = query.where(Order.status == status)
     
-    orders = query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
-    total = query.count()
+    try:
+        orders, next_cursor = await keyset_page(
+            db, query, (Order.created_at, Order.id), cursor, limit, descending=True
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="cursor نامعتبر")
     
     return {
         "orders": orders,
-        "total": total
+        "next_cursor": next_cursor,
+        "total": await count_rows(db, query, count)
     }
 
-@router.get("/{order_id}")
-def get_order(
+@router.get("/{order_id}", response_model=OrderDetail)
+async def get_order(
     order_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     دریافت جزئیات سفارش
     """
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = await db.get(Order, order_id, options=[selectinload(Order.items)])
     
     if not order:
         raise HTTPException(status_code=404, detail="سفارش یافت نشد")
     
     return order
 
-@router.get("/track/{order_number}")
-def track_order(
+@router.get("/track/{order_number}", response_model=OrderTracking)
+async def track_order(
     order_number: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     پیگیری سفارش با شماره سفارش
     """
-    order = db.query(Order).filter(Order.order_number == order_number).first()
+    # آیتم‌ها همراه سفارش خوانده می‌شوند (lazy load در AsyncSession ممکن نیست)
+    order = await db.scalar(
+        select(Order).options(selectinload(Order.items)).where(Order.order_number == order_number)
+    )
     
     if not order:
         raise HTTPException(status_code=404, detail="سفارش یافت نشد")
     
-    return {
-        "order_number": order.order_number,
-        "status": order.status,
-        "tracking_number": order.tracking_number,
-        "created_at": order.created_at,
-        "items": order.items
-    }
+    return order
 
-@router.patch("/{order_id}/status")
-def update_order_status(
+@router.patch("/{order_id}/status", response_model=OrderStatusUpdated)
+async def update_order_status(
     order_id: int,
     status: OrderStatus,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    cache: Optional[DashboardCache] = Depends(get_dashboard_cache)
 ):
     """
     به‌روزرسانی وضعیت سفارش
     """
-    order = db.query(Order).filter(Order.id == order_id).first()
+    # قفل ردیف تا دو تغییر وضعیت همزمان خلاصه روزانه را دو بار تغییر ندهند
+    order = await db.get(Order, order_id, with_for_update=True)
     
     if not order:
         raise HTTPException(status_code=404, detail="سفارش یافت نشد")
     
+    delta = status_change_delta(order, order.status, status)
     order.status = status
-    db.commit()
+    if any(delta.values()):
+        await db.execute(rollup_statement(db, order, delta))
+    await db.commit()
+    if cache is not None and any(delta.values()):
+        await cache.invalidate_stats()
     
     return {"success": True, "status": status}
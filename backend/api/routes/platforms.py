@@ -1,5 +1,12 @@
-from fastapi import APIRouter, HTTPException
-from services.platform_selector import PlatformSelector
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import settings
+from core.database import get_async_db
+from models.partner import SyncRun
+from services.jobs import submit_job
+from services.partner_sync import sync_run_dict
+from services.platform_selector import PlatformSelector, get_platform_selector
 
 router = APIRouter()
 
@@ -20,12 +27,10 @@ def get_platforms():
     }
 
 @router.get("/commissions")
-def get_commission_rates():
+def get_commission_rates(selector: PlatformSelector = Depends(get_platform_selector)):
     """
     دریافت نرخ کمیسیون پلتفرم‌ها
     """
-    selector = PlatformSelector()
-    
     rates = {}
     for name, platform in selector.platforms.items():
         rates[name] = {
@@ -35,3 +40,38 @@ def get_commission_rates():
         }
     
     return rates
+
+@router.get("/health")
+def get_platforms_health(selector: PlatformSelector = Depends(get_platform_selector)):
+    """
+    وضعیت سلامت پلتفرم‌ها (circuit breaker، نرخ خطا و تأخیر)
+    """
+    return selector.health()
+
+@router.get("/cache-stats")
+def get_cache_stats(selector: PlatformSelector = Depends(get_platform_selector)):
+    """
+    آمار hit/miss کش جستجو
+    """
+    if selector.cache is None:
+        return {"enabled": False}
+    
+    return {"enabled": True, **selector.cache.stats()}
+
+@router.post("/mihanstore/orders/sync", status_code=202)
+def sync_mihanstore_orders(full: bool = False, priority: int = Query(settings.JOB_DEFAULT_PRIORITY, ge=0, le=9)):
+    """
+    همگام‌سازی افزایشی سفارشات و آمار پنل همکاری میهن استور (در صف پس‌زمینه)
+    """
+    job = submit_job("control.sync_partner_orders", {"vendor": "mihanstore", "full": full}, priority=priority)
+    return {"success": True, **job, "status_url": f"/api/jobs/{job['job_id']}"}
+
+@router.get("/mihanstore/orders/sync-runs")
+async def get_mihanstore_sync_runs(limit: int = Query(20, ge=1, le=200), db: AsyncSession = Depends(get_async_db)):
+    """
+    آخرین اجراهای همگام‌سازی (مدت و تعداد ردیف‌ها)
+    """
+    runs = (await db.scalars(
+        select(SyncRun).where(SyncRun.vendor == "mihanstore").order_by(SyncRun.id.desc()).limit(limit)
+    )).all()
+    return {"runs": [sync_run_dict(run) for run in runs]}
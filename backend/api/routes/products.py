@@ -1,10 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, load_only, selectinload
 from typing import List, Optional
-from core.database import get_db
+from core.database import get_async_db
+from core.pagination import count_rows, keyset_page, summary_columns
+from core.config import settings
 from models.product import Product, Category
-from services.platform_selector import PlatformSelector
+from schemas.product import CategoryList, ProductDetail, ProductPage, ProductSummary
+from services.platform_selector import PlatformSelector, get_platform_selector
+from services.jobs import submit_job
+from integrations.resilience import PlatformError
 import asyncio
+import json
 
 router = APIRouter()
 
@@ -12,121 +21,144 @@ router = APIRouter()
 async def search_products(
     q: str = Query(..., min_length=2),
     platform: Optional[str] = None,
-    db: Session = Depends(get_db)
+    selector: PlatformSelector = Depends(get_platform_selector)
 ):
     """
     جستجوی محصولات در تمام پلتفرم‌ها یا پلتفرم خاص
     """
-    selector = PlatformSelector()
+    if platform:
+        # جستجو در یک پلتفرم خاص
+        if platform not in selector.platforms:
+            raise HTTPException(status_code=400, detail="پلتفرم نامعتبر")
+        
+        try:
+            results = await selector.search_platform(platform, q)
+        except PlatformError as e:
+            raise HTTPException(status_code=503, detail=f"پلتفرم در دسترس نیست: {e}")
+        return {"platform": platform, "results": [product.to_dict() for product in results]}
+    else:
+        # جستجو در همه پلتفرم‌ها
+        comparison = await selector.compare_prices(q)
+        return comparison
+
+@router.get("/search/stream")
+async def stream_search_products(
+    q: str = Query(..., min_length=2),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+    selector: PlatformSelector = Depends(get_platform_selector)
+):
+    """
+    جستجوی جریانی در همه پلتفرم‌ها
+    نتیجه هر پلتفرم به محض آماده شدن ارسال می‌شود و در پایان پیشنهاد نهایی
+    (NDJSON یا Server-Sent Events)
+    """
+    async def events():
+        async for event in selector.stream_compare_prices(q):
+            data = json.dumps(event, ensure_ascii=False, default=str)
+            if format == "sse":
+                yield f"event: {event['event']}\ndata: {data}\n\n"
+            else:
+                yield data + "\n"
     
-    try:
-        if platform:
-            # جستجو در یک پلتفرم خاص
-            if platform not in selector.platforms:
-                raise HTTPException(status_code=400, detail="پلتفرم نامعتبر")
-            
-            results = await selector.platforms[platform].search_product(q)
-            return {"platform": platform, "results": results}
-        else:
-            # جستجو در همه پلتفرم‌ها
-            comparison = await selector.compare_prices(q)
-            return comparison
-    finally:
-        await selector.close_all()
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        events(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-@router.get("/")
-def get_products(
-    skip: int = 0,
-    limit: int = 50,
+@router.get("/", response_model=ProductPage)
+async def get_products(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
     category_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    count: str = Query("none", pattern="^(none|exact|estimated)$"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     دریافت لیست محصولات
+    صفحه بعد با next_cursor؛ تعداد کل فقط با count=exact یا count=estimated
     """
-    query = db.query(Product)
+    query = select(Product).options(load_only(*summary_columns(Product, ProductSummary)))
     
     if category_id:
-        query = query.filter(Product.category_id == category_id)
+        query = query.where(Product.category_id == category_id)
     
-    products = query.offset(skip).limit(limit).all()
-    total = query.count()
+    try:
+        products, next_cursor = await keyset_page(db, query, (Product.id,), cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="cursor نامعتبر")
     
     return {
         "products": products,
-        "total": total,
-        "page": skip // limit + 1,
-        "pages": (total + limit - 1) // limit
+        "next_cursor": next_cursor,
+        "total": await count_rows(db, query, count)
     }
 
-@router.get("/{product_id}")
-def get_product(
+@router.get("/{product_id}", response_model=ProductDetail)
+async def get_product(
     product_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     دریافت جزئیات یک محصول
     """
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(
+        Product, product_id, options=[joinedload(Product.category), selectinload(Product.listings)]
+    )
     
     if not product:
         raise HTTPException(status_code=404, detail="محصول یافت نشد")
     
     # افزایش تعداد بازدید
     product.views += 1
-    db.commit()
+    await db.commit()
     
     return product
 
-@router.get("/categories/")
-def get_categories(db: Session = Depends(get_db)):
+@router.get("/categories/", response_model=CategoryList)
+async def get_categories(db: AsyncSession = Depends(get_async_db)):
     """
     دریافت لیست دسته‌بندی‌ها
     """
-    categories = db.query(Category).filter(Category.parent_id == None).all()
+    categories = (await db.scalars(select(Category).where(Category.parent_id == None))).all()
     return {"categories": categories}
 
-@router.post("/sync")
-async def sync_products(
+@router.post("/refresh-prices", status_code=202)
+def refresh_prices(
+    platform: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    priority: int = Query(settings.JOB_DEFAULT_PRIORITY, ge=0, le=9),
+    selector: PlatformSelector = Depends(get_platform_selector)
+):
+    """
+    به‌روزرسانی انبوه قیمت محصولات از پلتفرم‌ها (در صف پس‌زمینه)
+    وضعیت و نتیجه (checked/fetched/changed/failed): GET /api/jobs/{job_id}
+    """
+    if platform and platform not in selector.platforms:
+        raise HTTPException(status_code=400, detail="پلتفرم نامعتبر")
+    
+    job = submit_job("control.refresh_prices", {"platform": platform, "limit": limit}, priority=priority)
+    return {"success": True, **job, "status_url": f"/api/jobs/{job['job_id']}"}
+
+@router.post("/sync", status_code=202)
+def sync_products(
     platform: str,
     query: str,
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=5000),
+    priority: int = Query(settings.JOB_DEFAULT_PRIORITY, ge=0, le=9),
+    selector: PlatformSelector = Depends(get_platform_selector)
 ):
     """
-    همگام‌سازی محصولات از پلتفرم‌های خارجی
+    همگام‌سازی محصولات از پلتفرم‌های خارجی (در صف پس‌زمینه)
+    وضعیت و پیشرفت: GET /api/jobs/{job_id}
     """
-    selector = PlatformSelector()
-    
     if platform not in selector.platforms:
         raise HTTPException(status_code=400, detail="پلتفرم نامعتبر")
     
-    try:
-        results = await selector.platforms[platform].search_product(query)
-        
-        synced_count = 0
-        for item in results:
-            # بررسی وجود محصول
-            existing = db.query(Product).filter(
-                Product.platforms.contains({platform: {"id": item["id"]}})
-            ).first()
-            
-            if not existing:
-                # ایجاد محصول جدید
-                product = Product(
-                    title=item["title"],
-                    price=item["price"],
-                    main_image=item["image"],
-                    platforms={platform: item}
-                )
-                db.add(product)
-                synced_count += 1
-        
-        db.commit()
-        
-        return {
-            "success": True,
-            "synced": synced_count,
-            "total_found": len(results)
-        }
-    finally:
-        await selector.close_all()
+    job = submit_job(
+        "control.sync_catalog",
+        {"platform": platform, "query": query, "limit": limit},
+        priority=priority
+    )
+    return {"success": True, **job, "status_url": f"/api/jobs/{job['job_id']}"}
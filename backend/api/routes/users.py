@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from core.database import get_db
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_async_db
 from core.security import get_password_hash, verify_password, create_access_token
 from models.user import User, UserRole
+from services.dashboard_cache import DashboardCache, get_dashboard_cache
+from schemas.user import AuthResponse, UserOut
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 
@@ -18,31 +22,35 @@ class UserLogin(BaseModel):
     phone: str
     password: str
 
-@router.post("/register")
-def register(
+@router.post("/register", response_model=AuthResponse)
+async def register(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    cache: Optional[DashboardCache] = Depends(get_dashboard_cache)
 ):
     """
     ثبت‌نام کاربر جدید
     """
     # بررسی وجود کاربر
-    existing = db.query(User).filter(User.phone == user_data.phone).first()
+    existing = await db.scalar(select(User).where(User.phone == user_data.phone))
     if existing:
         raise HTTPException(status_code=400, detail="شماره تلفن قبلاً ثبت شده است")
     
     # ایجاد کاربر جدید
+    # bcrypt سنگین است و نباید event loop را نگه دارد
+    password_hash = await run_in_threadpool(get_password_hash, user_data.password)
     user = User(
         email=user_data.email,
         phone=user_data.phone,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=password_hash,
         full_name=user_data.full_name,
         role=UserRole.CUSTOMER
     )
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    if cache is not None:
+        await cache.invalidate_stats()
     
     # ایجاد توکن
     token = create_access_token({"user_id": user.id, "phone": user.phone})
@@ -52,22 +60,23 @@ def register(
         "user": {
             "id": user.id,
             "phone": user.phone,
-            "full_name": user.full_name
+            "full_name": user.full_name,
+            "role": user.role
         },
         "token": token
     }
 
-@router.post("/login")
-def login(
+@router.post("/login", response_model=AuthResponse)
+async def login(
     credentials: UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     ورود کاربر
     """
-    user = db.query(User).filter(User.phone == credentials.phone).first()
+    user = await db.scalar(select(User).where(User.phone == credentials.phone))
     
-    if not user or not verify_password(credentials.password, user.password_hash):
+    if not user or not await run_in_threadpool(verify_password, credentials.password, user.password_hash):
         raise HTTPException(status_code=401, detail="شماره تلفن یا رمز عبور اشتباه است")
     
     if not user.is_active:
@@ -87,15 +96,15 @@ def login(
         "token": token
     }
 
-@router.get("/me")
-def get_current_user(
+@router.get("/me", response_model=UserOut)
+async def get_current_user(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     دریافت اطلاعات کاربر فعلی
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     
     if not user:
         raise HTTPException(status_code=404, detail="کاربر یافت نشد")
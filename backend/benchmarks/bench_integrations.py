@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+بنچمارک پارس و نرمال‌سازی integrationها روی پاسخ‌های ضبط‌شده
+
+مسیر کامل search_product و get_product_details هر پلتفرم (transport، circuit breaker،
+پارس و ساخت دیکشنری‌ها) با ReplayTransport و بدون شبکه اجرا می‌شود و برای هر
+اندازه نتیجه items/sec، تأخیر p50/p99 و بیشترین حافظه (tracemalloc) گزارش می‌شود.
+
+اجرا از پوشه backend:
+    python -m benchmarks.bench_integrations --sizes 10,100,1000 --output bench.json
+    python -m benchmarks.bench_integrations --fixtures fixtures/http --baseline old.json
+بدون --fixtures برای هر پلتفرم و اندازه یک پاسخ مصنوعی در مخزن موقت ساخته می‌شود.
+پاسخ واقعی با HTTP_RECORD_MODE=record در HTTP_RECORD_DIR ضبط می‌شود.
+"""
+
+import argparse
+import asyncio
+import json
+import platform as python_platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit, parse_qs
+
+import httpx
+
+from integrations.digikala import DigikalaIntegration
+from integrations.mihanstore import MihanstoreIntegration
+from integrations.torob import TorobIntegration
+from integrations.parsing import configure_parser_pool, shutdown_parser_pool
+from integrations.recording import get_store
+from benchmarks.bench_mihanstore_parse import synthetic_page
+
+INTEGRATIONS = {
+    "digikala": DigikalaIntegration,
+    "mihanstore": MihanstoreIntegration,
+    "torob": TorobIntegration
+}
+
+HOSTS = {
+    "api.digikala.com": "digikala",
+    "mihanstore.net": "mihanstore",
+    "api.torob.com": "torob"
+}
+
+def digikala_search(size: int) -> Dict:
+    return {"data": {"products": [
+        {
+            "id": 1000000 + i,
+            "title_fa": f"گوشی موبایل مدل {i} ظرفیت ۱۲۸ گیگابایت",
+            "default_variant": {"price": {"selling_price": (i % 900 + 100) * 10000}, "is_active": i % 7 != 0},
+            "images": {"main": {"url": [f"https://dkstatics-public.digikala.com/{i}.jpg"]}}
+        }
+        for i in range(size)
+    ]}}
+
+def torob_search(size: int) -> Dict:
+    return {"results": [
+        {
+            "name1": f"گوشی موبایل مدل {i} ظرفیت ۱۲۸ گیگابایت",
+            "web_client_absolute_url": f"/p/{2000000 + i}",
+            "price": {"min": (i % 900 + 100) * 10000},
+            "image_url": f"https://storage.torob.com/{i}.jpg"
+        }
+        for i in range(size)
+    ]}
+
+def digikala_product(product_id: str) -> Dict:
+    return {"data": {"product": {
+        "id": int(product_id),
+        "title_fa": "گوشی موبایل مدل ۱ ظرفیت ۱۲۸ گیگابایت",
+        "review": {"description": "توضیحات محصول " * 50},
+        "default_variant": {"price": {"selling_price": 125000000, "rrp_price": 130000000}},
+        "images": {"list": [{"url": [f"https://dkstatics-public.digikala.com/{i}.jpg"]} for i in range(10)]},
+        "category": {"title_fa": "گوشی موبایل"},
+        "brand": {"title_fa": "سامسونگ"},
+        "rating": {"rate": 4.2}
+    }}}
+
+def torob_product(product_id: str) -> Dict:
+    return {
+        "name1": "گوشی موبایل مدل ۱ ظرفیت ۱۲۸ گیگابایت",
+        "description": "توضیحات محصول " * 50,
+        "price": {"min": 125000000},
+        "image_url": "https://storage.torob.com/1.jpg"
+    }
+
+def mihanstore_product(product_id: str) -> str:
+    gallery = "".join(f'<img src="/images/{product_id}-{i}.jpg">' for i in range(10))
+    return (
+        f"<html><body><div class='header'>{'<p>menu</p>' * 200}</div>"
+        f'<h1 class="product-title">مانتو زنانه مدل {product_id}</h1>'
+        f'<div class="product-description">{"توضیحات محصول " * 50}</div>'
+        f'<span class="product-price">850,000 تومان</span>'
+        f'<div class="product-gallery">{gallery}</div></body></html>'
+    )
+
+def generate_fixtures(root: str, sizes: List[int]):
+    """ساخت پاسخ‌های مصنوعی در مخزن ضبط (همان کلیدهایی که integrationها درخواست می‌کنند)"""
+    store = get_store(root)
+
+    def save(url: str, body, params: Optional[Dict] = None):
+        if isinstance(body, str):
+            content, content_type = body.encode(), "text/html; charset=utf-8"
+        else:
+            content, content_type = json.dumps(body, ensure_ascii=False).encode(), "application/json"
+        request = httpx.Request("GET", url, params=params)
+        store.save(request, 200, httpx.Headers({"content-type": content_type}), content)
+
+    for size in sizes:
+        params = {"q": f"bench-{size}", "page": 1}
+        save("https://api.digikala.com/v1/search/", digikala_search(size), params)
+        save("https://api.torob.com/v4/search/", torob_search(size), params)
+        save("https://mihanstore.net/search", synthetic_page(size), params)
+
+    save("https://api.digikala.com/v1/product/1000001/", digikala_product("1000001"))
+    save("https://api.torob.com/v4/product/2000001/", torob_product("2000001"))
+    save("https://mihanstore.net/product/100001", mihanstore_product("100001"))
+
+def cases_from_store(root: str) -> List[Dict]:
+    """هر پاسخ ضبط‌شده یک سناریو: جستجو (q/page) یا جزئیات محصول"""
+    cases = []
+    for entry in get_store(root).index.values():
+        if entry["method"] != "GET" or entry["status"] != 200:
+            continue
+        url = urlsplit(entry["url"])
+        platform_name = HOSTS.get(url.hostname)
+        if platform_name is None:
+            continue
+
+        path = url.path.rstrip("/")
+        if path.endswith("/search"):
+            params = parse_qs(url.query)
+            query = params.get("q", [""])[0]
+            page = int(params.get("page", ["1"])[0])
+            cases.append({"platform": platform_name, "operation": "search", "args": (query, page)})
+        elif "/product/" in path:
+            cases.append({"platform": platform_name, "operation": "details", "args": (path.split("/")[-1],)})
+
+    return sorted(cases, key=lambda c: (c["platform"], c["operation"], c["args"]))
+
+async def run_case(integration, case: Dict, rounds: int) -> Dict:
+    method = getattr(
+        integration, "search_product" if case["operation"] == "search" else "get_product_details"
+    )
+
+    result = await method(*case["args"])  # warm up
+    items = len(result) if isinstance(result, list) else int(result is not None)
+
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        await method(*case["args"])
+        timings.append(time.perf_counter() - started)
+
+    # حافظه در یک اجرای جداگانه (tracemalloc زمان‌سنجی را کند می‌کند)
+    tracemalloc.start()
+    result = await method(*case["args"])
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    total = sum(timings)
+    percentiles = statistics.quantiles(timings, n=100) if len(timings) > 1 else timings * 99
+    return {
+        "platform": case["platform"],
+        "operation": case["operation"],
+        "args": list(case["args"]),
+        "items": items,
+        "rounds": rounds,
+        "items_per_sec": items * rounds / total if total else 0.0,
+        "p50_ms": statistics.median(timings) * 1000,
+        "p99_ms": percentiles[98] * 1000,
+        "peak_memory_kb": peak / 1024,
+        "result_memory_kb": current / 1024
+    }
+
+async def run_all(root: str, cases: List[Dict], rounds: int) -> List[Dict]:
+    # hedge در replay فقط کار تکراری است؛ بودجه retry صفر
+    options = {"record_mode": "replay", "record_dir": root, "retry_budget_max": 0}
+    integrations = {name: cls(http_options=options) for name, cls in INTEGRATIONS.items()}
+    try:
+        return [await run_case(integrations[case["platform"]], case, rounds) for case in cases]
+    finally:
+        for integration in integrations.values():
+            await integration.close_session()
+
+def result_key(result: Dict) -> str:
+    return f"{result['platform']}:{result['operation']}:{result['items']}"
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+def compare(results: List[Dict], baseline_path: str, max_regression: float) -> bool:
+    """مقایسه با نتایج ذخیره‌شده قبلی؛ False اگر افت throughput از حد بیشتر باشد"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {result_key(r): r for r in baseline["results"]}
+    print(f"\nvs baseline {baseline['meta'].get('commit') or baseline_path}")
+
+    ok = True
+    for r in results:
+        old = previous.get(result_key(r))
+        if old is None or not old["items_per_sec"]:
+            continue
+        change = r["items_per_sec"] / old["items_per_sec"] - 1
+        flag = ""
+        if change < -max_regression:
+            flag = "  ⚠️  regression"
+            ok = False
+        print(f"{result_key(r):<32}{change:>+9.1%} items/s  p99 {old['p99_ms']:.2f} → {r['p99_ms']:.2f} ms{flag}")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default="", help="مخزن پاسخ‌های ضبط‌شده (HTTP_RECORD_DIR)")
+    parser.add_argument("--sizes", default="10,100,1000", help="اندازه نتایج مصنوعی (بدون --fixtures)")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--pool", default="thread", choices=["thread", "process"])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--output", default="", help="ذخیره نتایج JSON")
+    parser.add_argument("--baseline", default="", help="نتایج JSON قبلی برای مقایسه")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    root = args.fixtures
+    if not root:
+        root = tempfile.mkdtemp(prefix="bench-fixtures-")
+        generate_fixtures(root, [int(s) for s in args.sizes.split(",")])
+
+    cases = cases_from_store(root)
+    if not cases:
+        print(f"⚠️  No recorded search/details responses in {root}")
+        sys.exit(1)
+
+    configure_parser_pool(args.pool, args.workers)
+    try:
+        results = asyncio.run(run_all(root, cases, args.rounds))
+    finally:
+        shutdown_parser_pool()
+
+    print(f"\n{len(cases)} case(s) x {args.rounds} rounds, parser pool: {args.pool}\n")
+    print(f"{'platform':<12}{'operation':<10}{'items':>7}{'items/s':>12}{'p50 ms':>9}{'p99 ms':>9}{'peak KB':>10}")
+    for r in results:
+        print(
+            f"{r['platform']:<12}{r['operation']:<10}{r['items']:>7}{r['items_per_sec']:>12.0f}"
+            f"{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['peak_memory_kb']:>10.1f}"
+        )
+
+    if args.output:
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "python": python_platform.python_version(),
+                "timestamp": time.time(),
+                "rounds": args.rounds,
+                "pool": args.pool,
+                "fixtures": args.fixtures or "synthetic"
+            },
+            "results": results
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    if args.baseline and not compare(results, args.baseline, args.max_regression):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+بنچمارک پارس صفحات جستجوی میهن استور
+
+مقایسه مسیر قبلی (BeautifulSoup + html.parser روی event loop) با مسیر جدید
+(lxml + سلکتورهای کامپایل‌شده در thread/process pool).
+
+اجرا از پوشه backend:
+    python -m benchmarks.bench_mihanstore_parse --pages ./saved_pages --rounds 20
+بدون --pages یک صفحه مصنوعی با --items محصول ساخته می‌شود.
+"""
+
+import argparse
+import asyncio
+import re
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from bs4 import BeautifulSoup
+
+from integrations.mihanstore import parse_search_page
+from integrations.parsing import configure_parser_pool, run_parser, shutdown_parser_pool
+
+BASE_URL = "https://mihanstore.net"
+
+def legacy_parse_search_page(page: str, base_url: str) -> List[Dict]:
+    """مسیر قبلی MihanstoreIntegration.search_product (برای مقایسه)"""
+    soup = BeautifulSoup(page, 'html.parser')
+    products = []
+    for item in soup.select('.product-item'):
+        try:
+            title = item.select_one('.product-title').text.strip()
+            price_text = item.select_one('.product-price').text.strip()
+            price = float(re.sub(r'[^0-9]', '', price_text)) / 1000
+            image = item.select_one('img')['src']
+            link = item.select_one('a')['href']
+            products.append({
+                "id": link.split('/')[-1],
+                "title": title,
+                "price": price,
+                "image": image if image.startswith('http') else f"{base_url}{image}",
+                "url": f"{base_url}{link}" if not link.startswith('http') else link
+            })
+        except Exception:
+            continue
+    return products
+
+def synthetic_page(items: int) -> str:
+    rows = []
+    for i in range(items):
+        rows.append(
+            f'<div class="product-item"><a href="/product/{100000 + i}">'
+            f'<img src="/images/{i}.jpg"><h3 class="product-title">مانتو زنانه مدل {i}</h3>'
+            f'<span class="product-price">{(i % 900 + 100) * 1000:,} تومان</span></a></div>'
+        )
+    return f"<html><body><div class='header'>{'<p>menu</p>' * 200}</div>{''.join(rows)}</body></html>"
+
+def load_pages(pages_dir: str, items: int) -> List[str]:
+    if pages_dir:
+        pages = [p.read_text(encoding="utf-8") for p in sorted(Path(pages_dir).glob("*.html"))]
+        if pages:
+            return pages
+        print(f"⚠️  No *.html pages in {pages_dir}, using a synthetic page")
+    return [synthetic_page(items)]
+
+def bench_sync(name: str, fn, pages: List[str], rounds: int) -> Dict:
+    timings = []
+    parsed = 0
+    for _ in range(rounds):
+        for page in pages:
+            started = time.perf_counter()
+            parsed += len(fn(page, BASE_URL))
+            timings.append(time.perf_counter() - started)
+    total = sum(timings)
+    return {
+        "name": name,
+        "pages_per_sec": len(timings) / total,
+        "items_per_sec": parsed / total,
+        "p50_ms": statistics.median(timings) * 1000,
+        "max_loop_block_ms": max(timings) * 1000
+    }
+
+async def bench_offloop(name: str, kind: str, workers: int, pages: List[str], rounds: int) -> Dict:
+    """پارس همزمان در pool و اندازه‌گیری بیشترین تأخیر event loop"""
+    configure_parser_pool(kind, workers)
+    await run_parser(parse_search_page, pages[0], BASE_URL)  # warm up workers
+    
+    lag = 0.0
+    running = True
+    
+    async def ticker():
+        nonlocal lag
+        while running:
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lag = max(lag, time.perf_counter() - started - 0.001)
+    
+    tick = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        run_parser(parse_search_page, page, BASE_URL)
+        for _ in range(rounds) for page in pages
+    ])
+    total = time.perf_counter() - started
+    running = False
+    await tick
+    shutdown_parser_pool()
+    
+    return {
+        "name": name,
+        "pages_per_sec": len(results) / total,
+        "items_per_sec": sum(len(r) for r in results) / total,
+        "p50_ms": None,
+        "max_loop_block_ms": lag * 1000
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default="", help="پوشه صفحات HTML ذخیره‌شده")
+    parser.add_argument("--items", type=int, default=200, help="تعداد محصول صفحه مصنوعی")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    
+    pages = load_pages(args.pages, args.items)
+    legacy_count = len(legacy_parse_search_page(pages[0], BASE_URL))
+    new_count = len(parse_search_page(pages[0], BASE_URL))
+    if legacy_count != new_count:
+        print(f"⚠️  Item count mismatch on first page: legacy={legacy_count} lxml={new_count}")
+    
+    results = [
+        bench_sync("bs4 html.parser (on loop)", legacy_parse_search_page, pages, args.rounds),
+        bench_sync("lxml compiled (on loop)", parse_search_page, pages, args.rounds),
+        asyncio.run(bench_offloop("lxml thread pool", "thread", args.workers, pages, args.rounds)),
+        asyncio.run(bench_offloop("lxml process pool", "process", args.workers, pages, args.rounds)),
+    ]
+    
+    print(f"\n{len(pages)} page(s) x {args.rounds} rounds, {new_count} items on first page\n")
+    print(f"{'path':<28}{'pages/s':>10}{'items/s':>12}{'p50 ms':>10}{'loop block ms':>16}")
+    for r in results:
+        p50 = f"{r['p50_ms']:.2f}" if r["p50_ms"] is not None else "-"
+        print(f"{r['name']:<28}{r['pages_per_sec']:>10.1f}{r['items_per_sec']:>12.0f}{p50:>10}{r['max_loop_block_ms']:>16.2f}")
+    
+    baseline = results[0]["items_per_sec"]
+    print(f"\nlxml speedup vs bs4: {results[1]['items_per_sec'] / baseline:.1f}x")
+
+if __name__ == "__main__":
+    main()
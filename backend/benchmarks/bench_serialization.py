@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+بنچمارک serialization endpointهای لیست (محصولات و سفارشات)
+
+دو اپ FastAPI روی همان اشیای ORM (بدون دیتابیس) مقایسه می‌شوند:
+- legacy: برگرداندن مستقیم اشیای ORM (jsonable_encoder + JSONResponse)
+- schema: response_model (ProductPage/OrderPage) + ORJSONResponse
+درخواست‌ها درون پروسه با httpx.ASGITransport فرستاده می‌شوند و برای هر اندازه
+تأخیر p50/p99، items/sec، حجم پاسخ و نسبت سرعت گزارش می‌شود.
+
+اجرا از پوشه backend:
+    python -m benchmarks.bench_serialization --sizes 50,200,1000 --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from models.order import Order, OrderStatus, PaymentStatus
+from models.product import Product
+from models.user import User  # noqa: F401  (mapper رابطه Order.user)
+from schemas.order import OrderPage
+from schemas.product import ProductPage
+
+def synthetic_products(size: int) -> List[Product]:
+    created = datetime(2024, 1, 1)
+    return [
+        Product(
+            id=i,
+            title=f"گوشی موبایل مدل {i} ظرفیت ۱۲۸ گیگابایت",
+            slug=f"mobile-{i}",
+            description="توضیحات محصول " * 20,
+            price=(i % 900 + 100) * 10000,
+            original_price=(i % 900 + 150) * 10000,
+            discount_percent=5,
+            main_image=f"https://cdn.dotshop.ir/products/{i}.jpg",
+            images=[f"https://cdn.dotshop.ir/products/{i}-{n}.jpg" for n in range(4)],
+            category_id=i % 20,
+            in_stock=i % 7 != 0,
+            quantity=i % 50,
+            platforms={
+                "torob": {"id": str(2000000 + i), "price": (i % 900 + 90) * 10000, "url": f"https://torob.com/p/{i}"},
+                "digikala": {"id": str(1000000 + i), "price": (i % 900 + 95) * 10000, "url": f"https://digikala.com/p/{i}"}
+            },
+            views=i * 3,
+            sales_count=i % 40,
+            created_at=created + timedelta(minutes=i),
+            updated_at=created + timedelta(minutes=i, seconds=30)
+        )
+        for i in range(1, size + 1)
+    ]
+
+def synthetic_orders(size: int) -> List[Order]:
+    created = datetime(2024, 1, 1)
+    return [
+        Order(
+            id=i,
+            order_number=f"DS-{10000000 + i}",
+            user_id=i % 100 + 1,
+            status=OrderStatus.PENDING if i % 5 else OrderStatus.SHIPPED,
+            payment_status=PaymentStatus.PAID,
+            subtotal=(i % 900 + 100) * 10000,
+            shipping_cost=50,
+            tax=0,
+            discount=0,
+            total=(i % 900 + 100) * 10000 + 50,
+            commission_amount=(i % 900 + 100) * 1200,
+            shipping_address={"full_name": "علی احمدی", "city": "تهران", "address": "خیابان آزادی، پلاک ۱۲"},
+            fulfilled_by="torob",
+            created_at=created + timedelta(minutes=i),
+            updated_at=created + timedelta(minutes=i)
+        )
+        for i in range(1, size + 1)
+    ]
+
+def build_apps(products: List[Product], orders: List[Order]) -> Dict[str, FastAPI]:
+    legacy = FastAPI(default_response_class=JSONResponse)
+
+    @legacy.get("/products")
+    async def legacy_products():
+        return {"products": products, "next_cursor": None, "total": None}
+
+    @legacy.get("/orders")
+    async def legacy_orders():
+        return {"orders": orders, "next_cursor": None, "total": None}
+
+    schema = FastAPI(default_response_class=ORJSONResponse)
+
+    @schema.get("/products", response_model=ProductPage)
+    async def schema_products():
+        return {"products": products, "next_cursor": None, "total": None}
+
+    @schema.get("/orders", response_model=OrderPage)
+    async def schema_orders():
+        return {"orders": orders, "next_cursor": None, "total": None}
+
+    return {"legacy": legacy, "schema": schema}
+
+async def run_case(app: FastAPI, path: str, items: int, rounds: int) -> Dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get(path)  # warm up
+        response.raise_for_status()
+        size = len(response.content)
+
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            await client.get(path)
+            timings.append(time.perf_counter() - started)
+
+    total = sum(timings)
+    percentiles = statistics.quantiles(timings, n=100) if len(timings) > 1 else timings * 99
+    return {
+        "items": items,
+        "rounds": rounds,
+        "items_per_sec": items * rounds / total if total else 0.0,
+        "p50_ms": statistics.median(timings) * 1000,
+        "p99_ms": percentiles[98] * 1000,
+        "response_kb": size / 1024
+    }
+
+async def run_all(sizes: List[int], rounds: int) -> List[Dict]:
+    results = []
+    for size in sizes:
+        apps = build_apps(synthetic_products(size), synthetic_orders(size))
+        for path in ("/products", "/orders"):
+            for variant, app in apps.items():
+                result = await run_case(app, path, size, rounds)
+                results.append({"endpoint": path, "variant": variant, **result})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="50,200,1000", help="تعداد ردیف هر صفحه")
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--output", default="", help="ذخیره نتایج JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_all([int(s) for s in args.sizes.split(",")], args.rounds))
+
+    print(f"\n{args.rounds} rounds per case\n")
+    print(f"{'endpoint':<11}{'variant':<8}{'items':>7}{'items/s':>12}{'p50 ms':>9}{'p99 ms':>9}{'KB':>9}{'speedup':>9}")
+    legacy = {(r["endpoint"], r["items"]): r for r in results if r["variant"] == "legacy"}
+    for r in results:
+        base = legacy[(r["endpoint"], r["items"])]
+        speedup = base["p50_ms"] / r["p50_ms"] if r["p50_ms"] else 0.0
+        print(
+            f"{r['endpoint']:<11}{r['variant']:<8}{r['items']:>7}{r['items_per_sec']:>12.0f}"
+            f"{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['response_kb']:>9.1f}{speedup:>8.2f}x"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 {args.output}")
+
+if __name__ == "__main__":
+    main()
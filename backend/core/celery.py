@@ -0,0 +1,38 @@
+from celery import Celery
+from core.config import settings
+
+# celery -A core.celery worker / beat (docker-compose)
+celery_app = Celery(
+    "control",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=["services.jobs"]
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    timezone="Asia/Tehran",
+    # وضعیت STARTED و نام/پارامترهای job برای endpoint وضعیت
+    task_track_started=True,
+    result_extended=True,
+    result_expires=settings.JOB_RESULT_TTL,
+    # هر worker فقط یک job جلوتر برمی‌دارد تا اولویت‌ها رعایت شوند
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    worker_concurrency=settings.CELERY_WORKER_CONCURRENCY,
+    # اولویت 0 (بالاترین) تا 9 روی Redis
+    task_default_priority=settings.JOB_DEFAULT_PRIORITY,
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "sep": ":",
+        "queue_order_strategy": "priority"
+    },
+    beat_schedule={
+        "sync-vendors": {
+            "task": "control.sync_vendors",
+            "schedule": settings.SYNC_VENDORS_INTERVAL
+        }
+    }
+)
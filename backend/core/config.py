@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Dict
 import os
 
 class Settings(BaseSettings):
@@ -18,6 +18,14 @@ class Settings(BaseSettings):
     @property
     def DATABASE_URL(self) -> str:
         return f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+
+    # Per-request SQL instrumentation (headers, /metrics/db, N+1 warnings)
+    SQL_INSTRUMENTATION_ENABLED: bool = True
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5  # same statement more often than this in one request
     
     # Redis
     REDIS_HOST: str = "redis"
@@ -27,6 +35,18 @@ class Settings(BaseSettings):
     def REDIS_URL(self) -> str:
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/0"
     
+    # Search result cache (seconds)
+    SEARCH_CACHE_ENABLED: bool = True
+    SEARCH_CACHE_TTL: float = 300
+    SEARCH_CACHE_TTLS: Dict[str, float] = {}  # {"torob": 600, "compare": 120}
+    SEARCH_CACHE_STALE_TTL: float = 600
+    SEARCH_CACHE_MAX_ENTRIES: int = 2048
+    
+    # Dashboard cache (invalidated on writes; TTL is only a safety net)
+    DASHBOARD_CACHE_ENABLED: bool = True
+    DASHBOARD_CACHE_TTL: float = 300
+    DASHBOARD_TOP_PRODUCTS_TTL: float = 3600  # top-products sorted set is rebuilt from the DB this often
+    
     # Security
     SECRET_KEY: str = "change-this-secret-key-in-production"
     JWT_SECRET: str = "change-this-jwt-secret-in-production"
@@ -39,9 +59,65 @@ class Settings(BaseSettings):
     # Platform APIs
     DIGIKALA_AFFILIATE_ID: str = ""
     MIHANSTORE_PARTNER_ID: str = ""
+    MIHANSTORE_PARTNER_URL: str = "https://mihanstore.net/partner/index.php"
+    
+    # Partner panel order sync (incremental, watermark based)
+    PARTNER_SYNC_LOOKBACK_DAYS: int = 14  # orders this old may still change status
+    PARTNER_SYNC_MAX_PAGES: int = 200
     BAMILO_AFFILIATE_KEY: str = ""
     TOROB_API_KEY: str = ""
     
+    # Platform search (seconds)
+    PLATFORM_SEARCH_TIMEOUT: float = 8.0
+    PLATFORM_SEARCH_TIMEOUTS: Dict[str, float] = {}  # {"mihanstore": 10.0}
+    SEARCH_TOTAL_BUDGET: float = 12.0
+    SEARCH_PAGE_LOOKAHEAD: int = 3  # pages prefetched concurrently in deep searches
+    SEARCH_MAX_PAGES: int = 50
+    
+    # Platform HTTP clients (shared for the app lifetime)
+    HTTP_TIMEOUT: float = 30.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_HTTP2: bool = True
+    PLATFORM_HTTP_OPTIONS: Dict[str, Dict] = {}  # {"mihanstore": {"http2": false, "max_connections": 20}}
+    HTTP_RECORD_MODE: str = "off"  # off | record | replay
+    HTTP_RECORD_DIR: str = "fixtures/http"
+    
+    # Browser automation (Playwright); vendors come from config/settings.json
+    BROWSER_SETTINGS_FILE: str = ""
+    BROWSER_POOL_SIZE: int = 2
+    BROWSER_MAX_PAGES_PER_VENDOR: int = 2
+    BROWSER_RECYCLE_AFTER: int = 50
+    BROWSER_HEADLESS: bool = True
+    
+    # Cross-platform product matching
+    MATCH_QUERY_THRESHOLD: float = 0.5
+    MATCH_CLUSTER_THRESHOLD: float = 0.5
+    
+    # Recommendation scoring weights (commission, price, stock, rating, shipping)
+    SCORING_WEIGHTS: Dict[str, float] = {"commission": 0.7, "price": 0.15, "rating": 0.1, "shipping": 0.05}
+    RECOMMENDATION_TOP_N: int = 5
+    
+    # Bulk price refresh
+    PRICE_REFRESH_BATCH_SIZE: int = 500
+    PRICE_REFRESH_DEFAULT_CONCURRENCY: int = 8
+    PRICE_REFRESH_CONCURRENCY: Dict[str, int] = {"mihanstore": 4}
+    
+    # HTML parsing pool ("thread" or "process")
+    PARSER_POOL: str = "thread"
+    PARSER_WORKERS: int = 4
+    
+    # Circuit breaker / hedged requests (per platform)
+    BREAKER_WINDOW: int = 50
+    BREAKER_MIN_REQUESTS: int = 10
+    BREAKER_ERROR_THRESHOLD: float = 0.5
+    BREAKER_OPEN_SECONDS: float = 30.0
+    HEDGE_PERCENTILE: float = 95
+    HEDGE_MIN_DELAY: float = 0.05
+    RETRY_BUDGET_RATIO: float = 0.1
+    RETRY_BUDGET_MAX: float = 10.0
+    
     # Telegram
     TELEGRAM_BOT_TOKEN: str = ""
     TELEGRAM_ADMIN_ID: str = ""
@@ -52,6 +128,13 @@ class Settings(BaseSettings):
     # Celery
     CELERY_BROKER_URL: str = "redis://redis:6379/1"
     CELERY_RESULT_BACKEND: str = "redis://redis:6379/2"
+    CELERY_WORKER_CONCURRENCY: int = 4
+    # Tests / local runs: CELERY_BROKER_URL=memory:// and CELERY_RESULT_BACKEND=cache+memory://
+    
+    # Background jobs
+    JOB_DEFAULT_PRIORITY: int = 5  # 0 (highest) .. 9
+    JOB_RESULT_TTL: int = 86400
+    SYNC_VENDORS_INTERVAL: float = 900  # seconds between scheduled control.sync_vendors runs
     
     class Config:
         env_file = "config/.env"
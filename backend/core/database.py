@@ -1,8 +1,10 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from core.config import settings
 
+# موتور sync برای اسکریپت‌ها، migrationها و jobهای Celery
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
@@ -12,6 +14,17 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# موتور async (asyncpg) برای routeهای API؛ روی همان event loop درخواست‌ها اجرا می‌شود
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20
+)
+
+# expire_on_commit=False: بعد از commit خواندن ستون‌ها query تنبل (و ناممکن در async) نمی‌سازد
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -20,3 +33,19 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def close_async_db():
+    await async_engine.dispose()
+
+async def run_sync_db(db, fn, *args):
+    """
+    اجرای کد دیتابیسی sync روی Session یا AsyncSession
+    سرویس‌هایی که هم در jobهای Celery و هم در routeهای async استفاده می‌شوند از این استفاده می‌کنند.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args)
+    return fn(db, *args)
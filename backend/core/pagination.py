@@ -0,0 +1,84 @@
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+import base64
+import json
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+COUNT_MODES = ("none", "exact", "estimated")
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """cursor مات (base64 از مقادیر کلید مرتب‌سازی آخرین ردیف)"""
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, columns: Sequence) -> Tuple:
+    """مقادیر cursor با نوع ستون‌ها؛ cursor نامعتبر ValueError می‌دهد"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}") from e
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("Invalid cursor")
+
+    decoded = []
+    for column, value in zip(columns, values):
+        python_type = column.type.python_type
+        try:
+            decoded.append(datetime.fromisoformat(value) if python_type is datetime else python_type(value))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid cursor: {e}") from e
+    return tuple(decoded)
+
+async def keyset_page(
+    db: AsyncSession,
+    query,
+    columns: Sequence,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False
+) -> Tuple[List, Optional[str]]:
+    """
+    یک صفحه با keyset pagination روی columns (آخرین ستون باید یکتا باشد، مثلاً id)
+    به جای OFFSET از شرط (columns) < cursor استفاده می‌شود تا صفحه‌های عمیق هم با index خوانده شوند.
+    خروجی: (ردیف‌ها، cursor صفحه بعد یا None)
+    """
+    key = tuple_(*columns)
+    if cursor:
+        after = tuple_(*decode_cursor(cursor, columns))
+        query = query.where(key < after if descending else key > after)
+
+    order = [column.desc() if descending else column.asc() for column in columns]
+    rows = (await db.scalars(query.order_by(*order).limit(limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+    return rows, next_cursor
+
+async def count_rows(db: AsyncSession, query, mode: str = "none") -> Optional[int]:
+    """
+    تعداد ردیف‌های query
+    - none: شمرده نمی‌شود
+    - exact: COUNT(*)
+    - estimated: تخمین planner از آمار جدول (EXPLAIN) روی PostgreSQL؛ روی بقیه دیتابیس‌ها exact
+    """
+    if mode == "none":
+        return None
+
+    if mode == "estimated" and db.get_bind().dialect.name == "postgresql":
+        # فیلترها فقط عدد و enum هستند؛ literal_binds برای EXPLAIN بدون پارامتر
+        sql = str(query.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}))
+        connection = await db.connection()
+        plan = (await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    return await db.scalar(select(func.count()).select_from(query.subquery()))
+
+def summary_columns(model, schema) -> List:
+    """ستون‌های model که در schema پاسخ هستند (برای load_only در لیست‌ها)"""
+    return [getattr(model, field) for field in schema.model_fields if field in model.__table__.columns]
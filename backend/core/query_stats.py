@@ -0,0 +1,130 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+
+class QueryStats:
+    """شمارش statementها و زمان دیتابیس در یک درخواست (یا یک بلوک query_budget)"""
+
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """statementهایی که بیش از threshold بار تکرار شده‌اند (الگوی N+1)"""
+        return {statement: count for statement, count in self.statements.items() if count > threshold}
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._query_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_query_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+def instrument_engine(engine: Engine):
+    """
+    ثبت event hookها روی engine (برای async engine: async_engine.sync_engine)
+    خارج از درخواست/بلوک شمارش (مثلاً jobهای Celery) کاری انجام نمی‌شود.
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+def start_query_stats() -> QueryStats:
+    stats = QueryStats()
+    _current.set(stats)
+    return stats
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+class QueryMetrics:
+    """
+    آمار تجمعی هر route: تعداد درخواست، statementها، زمان دیتابیس و موارد N+1
+    """
+
+    def __init__(self, n_plus_one_threshold: int = 5):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.routes: Dict[str, Dict] = {}
+
+    def observe(self, route: str, stats: QueryStats) -> Dict[str, int]:
+        """ثبت آمار یک درخواست؛ خروجی statementهای مشکوک به N+1"""
+        repeated = stats.repeated(self.n_plus_one_threshold)
+        entry = self.routes.setdefault(route, {
+            "requests": 0,
+            "queries": 0,
+            "max_queries": 0,
+            "db_time": 0.0,
+            "n_plus_one": 0
+        })
+        entry["requests"] += 1
+        entry["queries"] += stats.count
+        entry["max_queries"] = max(entry["max_queries"], stats.count)
+        entry["db_time"] += stats.duration
+        if repeated:
+            entry["n_plus_one"] += 1
+            for statement, count in repeated.items():
+                print(f"Possible N+1 in {route}: {count}x {' '.join(statement.split())[:200]}")
+        return repeated
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {
+            route: {
+                **entry,
+                "db_time": round(entry["db_time"], 4),
+                "avg_queries": round(entry["queries"] / entry["requests"], 2),
+                "avg_db_time_ms": round(entry["db_time"] * 1000 / entry["requests"], 2)
+            }
+            for route, entry in self.routes.items()
+        }
+
+@contextmanager
+def query_budget(max_queries: int, max_repeats: Optional[int] = None):
+    """
+    کمک‌کننده تست: statementهای اجرا‌شده در بلوک نباید از max_queries بیشتر شوند
+    (و با max_repeats هیچ statementی بیش از آن تکرار نشود)
+
+        with query_budget(3):
+            await PriceRefreshService(selector).refresh(db)
+    """
+    token = _current.set(QueryStats())
+    stats = _current.get()
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+    if stats.count > max_queries:
+        raise AssertionError(f"Query budget exceeded: {stats.count} > {max_queries}\n" + "\n".join(
+            f"{count}x {statement}" for statement, count in stats.statements.most_common()
+        ))
+    if max_repeats is not None and stats.repeated(max_repeats):
+        raise AssertionError(f"Repeated statements (N+1): {stats.repeated(max_repeats)}")
+
+def assert_query_budget(response, max_queries: int):
+    """
+    کمک‌کننده تست endpointها: تعداد statementهای درخواست از header پاسخ
+
+        assert_query_budget(client.get("/api/orders/"), 2)
+    """
+    count = int(response.headers[QUERY_COUNT_HEADER])
+    if count > max_queries:
+        raise AssertionError(f"{response.request.method} {response.request.url.path}: {count} queries > {max_queries}")
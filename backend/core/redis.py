@@ -0,0 +1,18 @@
+from typing import Optional
+import redis.asyncio as redis
+from core.config import settings
+
+_client: Optional[redis.Redis] = None
+
+def get_redis() -> redis.Redis:
+    """کلاینت مشترک Redis (async)"""
+    global _client
+    if _client is None:
+        _client = redis.from_url(settings.REDIS_URL)
+    return _client
+
+async def close_redis():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
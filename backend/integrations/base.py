@@ -1,36 +1,272 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
 import httpx
 import asyncio
+import inspect
+import time
 from bs4 import BeautifulSoup
+from .single_flight import SingleFlight
+from .resilience import CircuitBreaker, RetryBudget, PlatformError, PlatformUnavailable
+from .recording import build_transport
+from .records import Listing
 
 class BasePlatform(ABC):
     """
     کلاس پایه برای تمام پلتفرم‌ها
     """
     
-    def __init__(self, name: str, base_url: str, commission_rate: float):
+    # پاسخ‌هایی که یعنی پلتفرم ما را نمی‌پذیرد (بلاک، anti-bot، محدودیت نرخ)؛ مثل 5xx شکست حساب می‌شوند
+    FAILURE_STATUSES = frozenset({401, 403, 408, 429})
+    
+    def __init__(self, name: str, base_url: str, commission_rate: float, http_options: Optional[Dict] = None):
         self.name = name
         self.base_url = base_url
         self.commission_rate = commission_rate
+        self.http_options = http_options or {}
         self.session = None
+        self.inflight = SingleFlight()
+        
+        options = self.http_options
+        self.breaker = CircuitBreaker(
+            window=options.get("breaker_window", 50),
+            min_requests=options.get("breaker_min_requests", 10),
+            error_threshold=options.get("breaker_error_threshold", 0.5),
+            open_seconds=options.get("breaker_open_seconds", 30.0)
+        )
+        self.retry_budget = RetryBudget(
+            ratio=options.get("retry_budget_ratio", 0.1),
+            max_tokens=options.get("retry_budget_max", 10.0)
+        )
+        self.hedge_percentile = options.get("hedge_percentile", 95)
+        self.hedge_min_delay = options.get("hedge_min_delay", 0.05)
+        self.hedges = 0
+        
+        # درخواست‌های شرطی (LRU): url -> (ETag، Last-Modified، مقدار پارس‌شده)
+        # فقط validatorها و مقدار کوچک پارس‌شده (مثلاً قیمت) نگه داشته می‌شود، نه خود پاسخ
+        self._validators: "OrderedDict[str, Tuple[Optional[str], Optional[str], Any]]" = OrderedDict()
+        self.validator_cache_size = options.get("validator_cache_size", 10000)
     
     async def init_session(self):
+        """
+        ساخت کلاینت HTTP با connection pool و keep-alive
+        کلاینت بین درخواست‌ها مشترک است و فقط در close_session بسته می‌شود.
+        """
         if not self.session:
-            self.session = httpx.AsyncClient(timeout=30.0)
+            options = self.http_options
+            mode = options.get("record_mode", "off")
+            transport = None
+            if mode != "replay":
+                transport = httpx.AsyncHTTPTransport(
+                    http2=options.get("http2", False),
+                    limits=httpx.Limits(
+                        max_connections=options.get("max_connections", 100),
+                        max_keepalive_connections=options.get("max_keepalive_connections", 20),
+                        keepalive_expiry=options.get("keepalive_expiry", 30.0)
+                    )
+                )
+            self.session = httpx.AsyncClient(
+                timeout=options.get("timeout", 30.0),
+                # record/replay پاسخ‌ها در مخزن روی دیسک (integrations/recording.py)
+                transport=build_transport(mode, options.get("record_dir", "fixtures/http"), transport)
+            )
     
     async def close_session(self):
         if self.session:
             await self.session.aclose()
+            self.session = None
+    
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        """
+        GET با circuit breaker و hedged request
+        اگر پاسخ اصلی از صدک hedge_percentile تأخیر کندتر شود و بودجه اجازه دهد،
+        یک درخواست دوم فرستاده می‌شود و اولین پاسخ موفق برمی‌گردد.
+        """
+        return await self.get_parsed(url, None, **kwargs)
+    
+    async def get_parsed(self, url: str, parse: Optional[Callable[[httpx.Response], Any]], **kwargs) -> Any:
+        """
+        مثل get، ولی parse (عادی یا async) هم داخل محدوده circuit breaker اجرا می‌شود:
+        صفحه anti-bot با کد 200 یا تغییر ساختار پاسخ هم شکست پلتفرم ثبت می‌شود.
+        خطای parse به صورت PlatformError بالا می‌رود.
+        """
+        await self.init_session()
+        
+        if not self.breaker.allow():
+            raise PlatformUnavailable(f"{self.name} is unavailable (circuit open)")
+        
+        self.retry_budget.deposit()
+        started = time.monotonic()
+        tasks = [asyncio.create_task(self._send(url, **kwargs))]
+        
+        try:
+            delay = self.hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self.retry_budget.try_withdraw():
+                    self.hedges += 1
+                    tasks.append(asyncio.create_task(self._send(url, **kwargs)))
+            
+            response = await self._first_success(tasks)
+        except asyncio.CancelledError:
+            # لغو از سمت ما (قطع اتصال کلاینت، بودجه زمانی جستجو) خطای پلتفرم نیست
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self.breaker.record_failure(time.monotonic() - started)
+            if isinstance(e, PlatformError):
+                raise
+            raise PlatformError(f"{self.name} request failed: {e}") from e
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        latency = time.monotonic() - started
+        value = response
+        if parse is not None:
+            try:
+                value = parse(response)
+                if inspect.isawaitable(value):
+                    value = await value
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                self.breaker.record_failure(latency)
+                if isinstance(e, PlatformError):
+                    raise
+                raise PlatformError(f"{self.name} parse error: {e}") from e
+        
+        self.breaker.record_success(latency)
+        return value
+    
+    async def get_conditional(self, url: str, parse: Callable[[httpx.Response], Any], **kwargs) -> Any:
+        """
+        GET شرطی (If-None-Match/If-Modified-Since) برای مقدارهای کوچکی مثل قیمت
+        parse (عادی یا async) پاسخ 200 را به مقدار تبدیل می‌کند؛ با 304 مقدار قبلی
+        بدون دانلود و پارس دوباره برمی‌گردد. 404 یعنی None.
+        """
+        key = str(httpx.URL(url, params=kwargs.get("params")))
+        cached = self._validators.get(key)
+        if cached is not None:
+            etag, last_modified, _ = cached
+            headers = dict(kwargs.get("headers") or {})
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+            kwargs["headers"] = headers
+        
+        async def handle(response: httpx.Response) -> Any:
+            if response.status_code == 304 and cached is not None:
+                self._validators.move_to_end(key)
+                return cached[2]
+            if response.status_code == 404:
+                self._validators.pop(key, None)
+                return None
+            
+            value = parse(response)
+            if inspect.isawaitable(value):
+                value = await value
+            
+            etag, last_modified = response.headers.get("etag"), response.headers.get("last-modified")
+            if response.status_code == 200 and (etag or last_modified):
+                self._validators[key] = (etag, last_modified, value)
+                self._validators.move_to_end(key)
+                while len(self._validators) > self.validator_cache_size:
+                    self._validators.popitem(last=False)
+            return value
+        
+        return await self.get_parsed(url, handle, **kwargs)
+    
+    def hedge_delay(self) -> Optional[float]:
+        latency = self.breaker.latency_percentile(self.hedge_percentile)
+        if latency is None:
+            return None
+        return max(self.hedge_min_delay, latency)
+    
+    async def _send(self, url: str, **kwargs) -> httpx.Response:
+        response = await self.session.get(url, **kwargs)
+        if response.status_code in self.FAILURE_STATUSES or response.status_code >= 500:
+            raise PlatformError(f"{self.name} responded with HTTP {response.status_code}")
+        return response
+    
+    @staticmethod
+    async def _first_success(tasks: List[asyncio.Task]) -> httpx.Response:
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    
+    def health(self) -> Dict:
+        """وضعیت سلامت پلتفرم برای API"""
+        return {
+            "name": self.name,
+            **self.breaker.snapshot(),
+            "hedges": self.hedges,
+            "retry_budget_tokens": round(self.retry_budget.tokens, 2),
+            "in_flight": self.inflight.in_flight()
+        }
     
     @abstractmethod
-    async def search_product(self, query: str) -> List[Dict]:
-        """جستجوی محصول"""
+    async def search_product(self, query: str, page: int = 1) -> List[Listing]:
+        """جستجوی محصول در یک صفحه (پیاده‌سازی‌ها با @coalesce تزئین شوند)"""
         pass
     
+    async def iter_search(
+        self,
+        query: str,
+        max_items: Optional[int] = None,
+        lookahead: int = 3,
+        max_pages: int = 50
+    ) -> AsyncIterator[Listing]:
+        """
+        جستجو در همه صفحات به صورت async generator
+        حداکثر lookahead صفحه همزمان پیش‌خوانی می‌شود و صفحه‌های بعدی فقط وقتی
+        درخواست می‌شوند که مصرف‌کننده آیتم‌های قبلی را برداشته باشد (backpressure).
+        آیتم‌ها به ترتیب صفحه و بدون تکرار برگردانده می‌شوند؛ با رسیدن به max_items،
+        max_pages یا صفحه خالی جستجو متوقف می‌شود.
+        """
+        pending = deque()
+        next_page = 1
+        seen = set()
+        yielded = 0
+        
+        try:
+            while True:
+                while len(pending) < lookahead and next_page <= max_pages:
+                    pending.append(asyncio.create_task(self.search_product(query, page=next_page)))
+                    next_page += 1
+                if not pending:
+                    return
+                
+                items = await pending.popleft()
+                if not items:
+                    return
+                
+                # صفحه‌ای که همه‌اش تکراری است (مثلاً آیتم‌های تبلیغی) پایان جستجو نیست
+                for item in items:
+                    if item.id in seen:
+                        continue
+                    seen.add(item.id)
+                    yield item
+                    yielded += 1
+                    if max_items is not None and yielded >= max_items:
+                        return
+        finally:
+            for task in pending:
+                if task.done() and not task.cancelled():
+                    task.exception()
+                task.cancel()
+    
     @abstractmethod
     async def get_product_details(self, product_id: str) -> Optional[Dict]:
-        """دریافت جزئیات محصول"""
+        """دریافت جزئیات محصول (پیاده‌سازی‌ها با @coalesce تزئین شوند)"""
         pass
     
     @abstractmethod
@@ -38,6 +274,31 @@ class BasePlatform(ABC):
         """دریافت قیمت محصول"""
         pass
     
+    async def get_prices(self, product_ids: Iterable[str], concurrency: int = 8) -> Dict[str, Optional[float]]:
+        """
+        دریافت قیمت تعداد زیادی محصول به صورت همزمان (حداکثر concurrency درخواست)
+        شناسه‌های تکراری یک بار درخواست می‌شوند و محصولاتی که خطا بدهند در خروجی نیستند.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def fetch(product_id: str):
+            async with semaphore:
+                return product_id, await self.get_price(product_id)
+        
+        results = await asyncio.gather(
+            *[fetch(product_id) for product_id in dict.fromkeys(product_ids)],
+            return_exceptions=True
+        )
+        
+        prices = {}
+        for result in results:
+            if isinstance(result, BaseException):
+                print(f"{self.name} price error: {result}")
+                continue
+            product_id, price = result
+            prices[product_id] = price
+        return prices
+    
     def calculate_commission(self, price: float) -> float:
         """محاسبه کمیسیون"""
         return price * self.commission_rate
@@ -1,91 +1,152 @@
 from typing import List, Dict, Optional
 import httpx
-from bs4 import BeautifulSoup
 import re
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
 from .base import BasePlatform
+from .single_flight import coalesce
+from .resilience import PlatformError
+from .parsing import run_parser
+from .records import Listing
+
+# سلکتورها یک بار کامپایل می‌شوند (CSS -> XPath)
+SEARCH_ITEM = CSSSelector('.product-item')
+ITEM_TITLE = CSSSelector('.product-title')
+ITEM_PRICE = CSSSelector('.product-price')
+ITEM_IMAGE = CSSSelector('img')
+ITEM_LINK = CSSSelector('a')
+
+DETAIL_TITLE = CSSSelector('h1.product-title')
+DETAIL_DESCRIPTION = CSSSelector('.product-description')
+DETAIL_PRICE = CSSSelector('.product-price')
+DETAIL_GALLERY = CSSSelector('.product-gallery img')
+
+NON_DIGITS = re.compile(r'[^0-9]')
+
+def _first(selector: CSSSelector, element):
+    matches = selector(element)
+    if not matches:
+        raise ValueError(f"selector not found: {selector.css}")
+    return matches[0]
+
+def _parse_price(text: str) -> float:
+    return float(NON_DIGITS.sub('', text)) / 1000  # تبدیل به هزار تومان
+
+def parse_search_page(page: str, base_url: str) -> List[Listing]:
+    """
+    پارس صفحه نتایج جستجو با lxml
+    تابع خالص و سطح ماژول است تا در thread یا process pool اجرا شود.
+    """
+    if not page.strip():
+        return []
+    
+    root = lxml_html.fromstring(page)
+    products = []
+    
+    for item in SEARCH_ITEM(root):
+        try:
+            title = _first(ITEM_TITLE, item).text_content().strip()
+            price = _parse_price(_first(ITEM_PRICE, item).text_content().strip())
+            image = _first(ITEM_IMAGE, item).attrib['src']
+            link = _first(ITEM_LINK, item).attrib['href']
+            
+            products.append(Listing(
+                id=link.split('/')[-1],
+                platform="mihanstore",
+                title=title,
+                price=price,
+                image=image if image.startswith('http') else f"{base_url}{image}",
+                url=f"{base_url}{link}" if not link.startswith('http') else link
+            ))
+        except Exception:
+            continue
+    
+    return products
+
+def parse_product_page(page: str) -> Dict:
+    """پارس صفحه جزئیات محصول با lxml"""
+    root = lxml_html.fromstring(page)
+    
+    return {
+        "title": _first(DETAIL_TITLE, root).text_content().strip(),
+        "description": _first(DETAIL_DESCRIPTION, root).text_content().strip(),
+        "price": _parse_price(_first(DETAIL_PRICE, root).text_content().strip()),
+        "images": [img.attrib['src'] for img in DETAIL_GALLERY(root)]
+    }
+
+def parse_product_price(page: str) -> float:
+    """فقط قیمت صفحه محصول (برای به‌روزرسانی انبوه قیمت‌ها)"""
+    return _parse_price(_first(DETAIL_PRICE, lxml_html.fromstring(page)).text_content().strip())
 
 class MihanstoreIntegration(BasePlatform):
     """
     اتصال به میهن استور (کمیسیون بالا برای پوشاک)
     """
     
-    def __init__(self, partner_id: str = "", commission_rate: float = 0.40):
-        super().__init__("mihanstore", "https://mihanstore.net", commission_rate)
+    def __init__(self, partner_id: str = "", commission_rate: float = 0.40, http_options: Optional[Dict] = None):
+        super().__init__("mihanstore", "https://mihanstore.net", commission_rate, http_options)
         self.partner_id = partner_id
     
-    async def search_product(self, query: str) -> List[Dict]:
+    @coalesce
+    async def search_product(self, query: str, page: int = 1) -> List[Listing]:
         """جستجو در میهن استور"""
         await self.init_session()
         
         url = f"{self.base_url}/search"
-        params = {"q": query}
+        params = {"q": query, "page": page}
         
-        try:
-            response = await self.session.get(url, params=params)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            products = []
-            product_items = soup.select('.product-item')
-            
-            for item in product_items:
-                try:
-                    title = item.select_one('.product-title').text.strip()
-                    price_text = item.select_one('.product-price').text.strip()
-                    price = float(re.sub(r'[^0-9]', '', price_text)) / 1000  # تبدیل به هزار تومان
-                    image = item.select_one('img')['src']
-                    link = item.select_one('a')['href']
-                    product_id = link.split('/')[-1]
-                    
-                    products.append({
-                        "id": product_id,
-                        "title": title,
-                        "price": price,
-                        "image": image if image.startswith('http') else f"{self.base_url}{image}",
-                        "url": f"{self.base_url}{link}" if not link.startswith('http') else link,
-                        "platform": self.name,
-                        "commission": self.calculate_commission(price)
-                    })
-                except Exception as e:
-                    continue
-            
-            return products
-        except Exception as e:
-            print(f"Mihanstore search error: {e}")
-            return []
+        async def parse(response: httpx.Response) -> List[Listing]:
+            try:
+                return await run_parser(parse_search_page, response.text, self.base_url)
+            except Exception as e:
+                raise PlatformError(f"Mihanstore search parse error: {e}") from e
+        
+        products = await self.get_parsed(url, parse, params=params)
+        for product in products:
+            product.affiliate_url = self.generate_affiliate_link(product.id)
+            product.commission = self.calculate_commission(product.price)
+        
+        return products
     
+    @coalesce
     async def get_product_details(self, product_id: str) -> Optional[Dict]:
         """دریافت جزئیات محصول"""
         await self.init_session()
         
         url = f"{self.base_url}/product/{product_id}"
         
-        try:
-            response = await self.session.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
+        async def parse(response: httpx.Response) -> Optional[Dict]:
+            if response.status_code == 404:
+                return None
             
-            title = soup.select_one('h1.product-title').text.strip()
-            description = soup.select_one('.product-description').text.strip()
-            price_text = soup.select_one('.product-price').text.strip()
-            price = float(re.sub(r'[^0-9]', '', price_text)) / 1000
-            
-            images = [img['src'] for img in soup.select('.product-gallery img')]
-            
-            return {
-                "id": product_id,
-                "title": title,
-                "description": description,
-                "price": price,
-                "images": images,
-                "platform": self.name,
-                "commission": self.calculate_commission(price)
-            }
-        except Exception as e:
-            print(f"Mihanstore product details error: {e}")
+            try:
+                return await run_parser(parse_product_page, response.text)
+            except Exception as e:
+                raise PlatformError(f"Mihanstore product details parse error: {e}") from e
+        
+        details = await self.get_parsed(url, parse)
+        if details is None:
             return None
+        
+        return {
+            "id": product_id,
+            **details,
+            "platform": self.name,
+            "commission": self.calculate_commission(details["price"])
+        }
     
+    @coalesce
     async def get_price(self, product_id: str) -> Optional[float]:
-        details = await self.get_product_details(product_id)
-        return details.get("price") if details else None
+        """دریافت قیمت فعلی (درخواست شرطی، فقط قیمت پارس می‌شود)"""
+        url = f"{self.base_url}/product/{product_id}"
+        
+        async def parse(response: httpx.Response) -> Optional[float]:
+            try:
+                return await run_parser(parse_product_price, response.text)
+            except Exception as e:
+                raise PlatformError(f"Mihanstore price parse error: {e}") from e
+        
+        return await self.get_conditional(url, parse)
     
     def generate_affiliate_link(self, product_id: str) -> str:
         base_url = f"{self.base_url}/product/{product_id}"
@@ -0,0 +1,116 @@
+from typing import Dict, List
+import re
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+from .parsing import run_parser
+from .resilience import PlatformError
+
+# سلکتورهای پنل همکاری؛ با تغییر ساختار سایت فقط همین‌جا به‌روز شوند
+ORDER_ROW = CSSSelector('table tbody tr')
+ORDER_CELL = CSSSelector('td')
+STAT_BOX = CSSSelector('.stat-box')
+STAT_TITLE = CSSSelector('.stat-title')
+STAT_VALUE = CSSSelector('.stat-value')
+
+# ترتیب ستون‌های جدول سفارشات
+ORDER_COLUMNS = ("order_id", "product", "commission", "date", "tracking_code", "status")
+
+# عنوان کادرهای داشبورد -> نام فیلد
+STAT_LABELS = {
+    "تعداد کل سفارشات": "total_orders",
+    "درآمد کل": "total_revenue",
+    "سفارشات تعیین تکلیف شده": "completed_orders",
+    "سفارشات در حال بررسی": "pending_orders",
+    "سفارشات دیروز": "yesterday_orders",
+    "سفارشات امروز": "today_orders",
+    "درآمد از بازاریابی": "referral_revenue",
+    "درآمد پرداخت شده": "paid_revenue",
+    "کسر بابت برگشتی": "return_deduction",
+    "درآمد قابل برداشت": "withdrawable_revenue",
+}
+
+DIGITS = str.maketrans("۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩", "01234567890123456789")
+NON_DIGITS = re.compile(r'[^0-9]')
+
+def _text(element) -> str:
+    return " ".join(element.text_content().split()).translate(DIGITS)
+
+def _amount(text: str) -> int:
+    digits = NON_DIGITS.sub('', text)
+    return int(digits) if digits else 0
+
+def _date(text: str) -> str:
+    """تاریخ شمسی به شکل YYYY-MM-DD (برای مقایسه رشته‌ای)"""
+    parts = re.findall(r'\d+', text)
+    if len(parts) != 3:
+        return text
+    year, month, day = (int(part) for part in parts)
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+def parse_orders_page(page: str) -> List[Dict]:
+    """پارس جدول سفارشات پنل (جدیدترین سفارش اول)"""
+    root = lxml_html.fromstring(page)
+    orders = []
+
+    for row in ORDER_ROW(root):
+        cells = [_text(cell) for cell in ORDER_CELL(row)]
+        if len(cells) < len(ORDER_COLUMNS) or not cells[0].isdigit():
+            continue
+        order = dict(zip(ORDER_COLUMNS, cells))
+        orders.append({
+            "order_id": order["order_id"],
+            "product": order["product"],
+            "commission": order["commission"],
+            "commission_amount": _amount(order["commission"]),
+            "date": _date(order["date"]),
+            "tracking_code": order["tracking_code"] or None,
+            "status": order["status"]
+        })
+
+    return orders
+
+def parse_dashboard_stats(page: str) -> Dict[str, int]:
+    """پارس کادرهای آمار داشبورد"""
+    root = lxml_html.fromstring(page)
+    stats = {}
+
+    for box in STAT_BOX(root):
+        titles = STAT_TITLE(box)
+        values = STAT_VALUE(box)
+        if not titles or not values:
+            continue
+        field = STAT_LABELS.get(_text(titles[0]))
+        if field:
+            stats[field] = _amount(_text(values[0]))
+
+    return stats
+
+class MihanstorePartnerClient:
+    """
+    خواندن سفارشات و آمار از پنل همکاری میهن استور
+    صفحه‌ها از browser pool (vendor=mihanstore با storage_state لاگین) گرفته می‌شوند.
+    """
+
+    def __init__(self, pool, base_url: str = "https://mihanstore.net/partner/index.php", vendor: str = "mihanstore"):
+        self.pool = pool
+        self.base_url = base_url
+        self.vendor = vendor
+
+    async def fetch_orders_page(self, page_number: int) -> List[Dict]:
+        page = await self._get(f"{self.base_url}?act=orders&page={page_number}")
+        return await run_parser(parse_orders_page, page)
+
+    async def fetch_dashboard_stats(self) -> Dict[str, int]:
+        page = await self._get(f"{self.base_url}?act=dashboard")
+        return await run_parser(parse_dashboard_stats, page)
+
+    async def _get(self, url: str) -> str:
+        async with self.pool.page(self.vendor) as page:
+            response = await page.goto(url, wait_until="domcontentloaded")
+            if "act=logins" in page.url:
+                raise PlatformError(
+                    "Mihanstore partner session expired; run scripts/mihanstore_login_manual.py"
+                )
+            if response is not None and response.status >= 400:
+                raise PlatformError(f"Mihanstore partner panel responded with HTTP {response.status}")
+            return await page.content()
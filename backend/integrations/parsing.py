@@ -0,0 +1,37 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+import asyncio
+
+_executor: Optional[Executor] = None
+_kind = "thread"
+_workers = 4
+
+def configure_parser_pool(kind: str = "thread", workers: int = 4):
+    """
+    انتخاب نوع pool برای پارس HTML: thread یا process
+    process برای صفحات خیلی بزرگ بهتر است چون GIL را دور می‌زند.
+    """
+    global _kind, _workers
+    shutdown_parser_pool()
+    _kind = kind
+    _workers = workers
+
+def get_parser_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if _kind == "process":
+            _executor = ProcessPoolExecutor(max_workers=_workers)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=_workers, thread_name_prefix="html-parser")
+    return _executor
+
+def shutdown_parser_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def run_parser(fn: Callable[..., Any], *args) -> Any:
+    """اجرای تابع پارس خارج از event loop (fn باید در سطح ماژول تعریف شده باشد)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_parser_executor(), fn, *args)
@@ -0,0 +1,170 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Optional, Tuple
+import httpx
+
+# هدرهایی که بعد از خواندن بدنه (decode شده) دیگر معتبر نیستند
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+class ReplayMiss(httpx.TransportError):
+    """درخواستی که در حالت replay پاسخ ضبط‌شده ندارد"""
+
+def request_key(request: httpx.Request) -> str:
+    """
+    کلید پایدار درخواست: متد + آدرس با پارامترهای مرتب‌شده + hash بدنه
+    هدرها (از جمله If-None-Match) در کلید نیستند تا replay قطعی باشد.
+    """
+    url = request.url
+    params = sorted(url.params.multi_items())
+    canonical = {
+        "method": request.method,
+        "url": str(url.copy_with(query=None)),
+        "params": params,
+        "body": hashlib.sha256(request.content).hexdigest() if request.content else None
+    }
+    return hashlib.sha256(
+        json.dumps(canonical, ensure_ascii=False, sort_keys=True).encode()
+    ).hexdigest()
+
+class ResponseStore:
+    """
+    مخزن پاسخ‌های HTTP روی دیسک
+    بدنه‌ها gzip شده و با sha256 محتوا در objects/ ذخیره می‌شوند (بدنه تکراری یک بار)
+    و index.jsonl هر کلید درخواست را به وضعیت، هدرها و digest بدنه نگاشت می‌کند.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.index_path = os.path.join(root, "index.jsonl")
+        self._index: Optional[Dict[str, Dict]] = None
+
+    @property
+    def index(self) -> Dict[str, Dict]:
+        if self._index is None:
+            self._index = {}
+            if os.path.exists(self.index_path):
+                with open(self.index_path, encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            # ضبط جدیدتر یک درخواست جای قبلی را می‌گیرد
+                            self._index[entry["key"]] = entry
+        return self._index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest[2:] + ".gz")
+
+    def put_body(self, body: bytes) -> str:
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + ".tmp"
+            # mtime=0 تا فایل فشرده برای محتوای یکسان همیشه یکسان باشد
+            with open(tmp, "wb") as f:
+                with gzip.GzipFile(fileobj=f, mode="wb", mtime=0) as gz:
+                    gz.write(body)
+            os.replace(tmp, path)
+        return digest
+
+    def get_body(self, digest: str) -> bytes:
+        with gzip.open(self.object_path(digest), "rb") as f:
+            return f.read()
+
+    def save(self, request: httpx.Request, status_code: int, headers: httpx.Headers, body: bytes):
+        entry = {
+            "key": request_key(request),
+            "method": request.method,
+            "url": str(request.url),
+            "status": status_code,
+            "headers": [
+                [name, value] for name, value in headers.multi_items()
+                if name.lower() not in DROPPED_HEADERS
+            ],
+            "body": self.put_body(body),
+            "size": len(body),
+            "recorded_at": time.time()
+        }
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.index[entry["key"]] = entry
+
+    def load(self, request: httpx.Request) -> Optional[Tuple[int, list, bytes]]:
+        entry = self.index.get(request_key(request))
+        if entry is None:
+            return None
+        return entry["status"], entry["headers"], self.get_body(entry["body"])
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """ارسال واقعی درخواست و ضبط پاسخ در ResponseStore"""
+
+    def __init__(self, store: ResponseStore, transport: httpx.AsyncBaseTransport):
+        self.store = store
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.transport.handle_async_request(request)
+        try:
+            # aread بدنه را decode می‌کند (gzip/br)؛ هدرهای فشرده‌سازی حذف می‌شوند
+            content = await response.aread()
+        finally:
+            await response.aclose()
+
+        # 304 جای پاسخ کامل قبلی را در مخزن نمی‌گیرد
+        if response.status_code != 304:
+            self.store.save(request, response.status_code, response.headers, content)
+
+        headers = [
+            (name, value) for name, value in response.headers.multi_items()
+            if name.lower() not in DROPPED_HEADERS
+        ]
+        return httpx.Response(
+            response.status_code, headers=headers, content=content, request=request
+        )
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """پاسخ از ResponseStore بدون دسترسی به شبکه"""
+
+    def __init__(self, store: ResponseStore):
+        self.store = store
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        recorded = self.store.load(request)
+        if recorded is None:
+            raise ReplayMiss(f"No recorded response for {request.method} {request.url}", request=request)
+        status_code, headers, body = recorded
+        return httpx.Response(status_code, headers=headers, content=body, request=request)
+
+_stores: Dict[str, ResponseStore] = {}
+
+def get_store(root: str) -> ResponseStore:
+    """یک ResponseStore مشترک برای هر مسیر"""
+    root = os.path.abspath(root)
+    if root not in _stores:
+        _stores[root] = ResponseStore(root)
+    return _stores[root]
+
+def build_transport(
+    mode: str, root: str, transport: Optional[httpx.AsyncBaseTransport]
+) -> Optional[httpx.AsyncBaseTransport]:
+    """
+    transport کلاینت پلتفرم بر اساس حالت ضبط:
+    off = شبکه، record = شبکه + ضبط، replay = فقط مخزن
+    """
+    if mode == "record":
+        return RecordingTransport(get_store(root), transport)
+    if mode == "replay":
+        return ReplayTransport(get_store(root))
+    if mode != "off":
+        raise ValueError(f"Unknown HTTP record mode: {mode}")
+    return transport
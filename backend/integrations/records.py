@@ -0,0 +1,46 @@
+from dataclasses import dataclass, fields
+from typing import Dict, Iterable, List, Optional, Sequence
+
+@dataclass(slots=True)
+class Listing:
+    """
+    یک نتیجه جستجو در یک پلتفرم (خروجی مشترک همه integrationها)
+    slots یعنی بدون __dict__ برای هر آیتم؛ در کش به صورت ردیف (لیست مقادیر) ذخیره می‌شود.
+    """
+    id: str
+    platform: str
+    title: str
+    price: float
+    url: str = ""
+    affiliate_url: str = ""
+    image: str = ""
+    in_stock: bool = True
+    commission: Optional[float] = None
+    rating: Optional[float] = None
+    shipping_cost: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        """دیکشنری برای خروجی API و ستون data"""
+        return {name: getattr(self, name) for name in FIELDS}
+
+    def to_row(self) -> tuple:
+        return tuple(getattr(self, name) for name in FIELDS)
+
+    @classmethod
+    def from_row(cls, row: Sequence) -> "Listing":
+        return cls(*row)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Listing":
+        values = {name: data[name] for name in FIELDS if name in data}
+        values["id"] = str(values.get("id", ""))
+        return cls(**values)
+
+FIELDS = tuple(field.name for field in fields(Listing))
+
+def dump_listings(listings: Iterable[Listing]) -> List[tuple]:
+    """کدگذاری فشرده برای کش: بدون تکرار نام فیلدها"""
+    return [listing.to_row() for listing in listings]
+
+def load_listings(rows: Iterable[Sequence]) -> List[Listing]:
+    return [Listing.from_row(row) for row in rows]
@@ -0,0 +1,133 @@
+from collections import deque
+from typing import Dict, Optional
+import time
+
+class PlatformError(Exception):
+    """خطای ارتباط با پلتفرم (جدا از «محصولی یافت نشد»)"""
+    pass
+
+class PlatformUnavailable(PlatformError):
+    """مدار پلتفرم باز است و درخواست بلافاصله رد شد"""
+    pass
+
+class CircuitBreaker:
+    """
+    Circuit breaker بر اساس نرخ خطا در پنجره آخرین درخواست‌ها
+    closed: درخواست‌ها عادی ارسال می‌شوند
+    open: تا open_seconds همه درخواست‌ها فوراً رد می‌شوند
+    half_open: چند درخواست آزمایشی؛ موفقیت مدار را می‌بندد و خطا دوباره باز می‌کند
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(
+        self,
+        window: int = 50,
+        min_requests: int = 10,
+        error_threshold: float = 0.5,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1
+    ):
+        self.min_requests = min_requests
+        self.error_threshold = error_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self._probes = 0
+        self._outcomes = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+        self.counters = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+    
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                self.counters["rejected"] += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._probes = 0
+        
+        if self.state == self.HALF_OPEN:
+            if self._probes >= self.half_open_probes:
+                self.counters["rejected"] += 1
+                return False
+            self._probes += 1
+        
+        return True
+    
+    def release(self):
+        """درخواستی که بدون نتیجه لغو شد؛ نوبت آزمایشی half_open پس داده می‌شود"""
+        if self.state == self.HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+    
+    def record_success(self, latency: float):
+        self.counters["successes"] += 1
+        self._outcomes.append(True)
+        self._latencies.append(latency)
+        if self.state == self.HALF_OPEN:
+            self.state = self.CLOSED
+            self._outcomes.clear()
+    
+    def record_failure(self, latency: float):
+        self.counters["failures"] += 1
+        self._outcomes.append(False)
+        self._latencies.append(latency)
+        if self.state == self.HALF_OPEN or (
+            len(self._outcomes) >= self.min_requests and self.error_rate() >= self.error_threshold
+        ):
+            self._open()
+    
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+    
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """صدک تأخیر درخواست‌های اخیر؛ تا نمونه کافی نباشد None"""
+        if len(self._latencies) < self.min_requests:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+        return ordered[index]
+    
+    def snapshot(self) -> Dict:
+        p50 = self.latency_percentile(50)
+        p95 = self.latency_percentile(95)
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate(), 3),
+            "window_size": len(self._outcomes),
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "retry_after": max(0.0, round(self.open_seconds - (time.monotonic() - self.opened_at), 1))
+            if self.state == self.OPEN else 0.0,
+            **self.counters
+        }
+    
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.counters["opened"] += 1
+
+class RetryBudget:
+    """
+    بودجه درخواست‌های اضافه (hedge/retry)
+    هر درخواست اصلی ratio توکن اضافه می‌کند و هر hedge یک توکن مصرف می‌کند،
+    پس درخواست‌های اضافه هیچ‌وقت بیشتر از ratio کل ترافیک نمی‌شوند.
+    """
+    
+    def __init__(self, ratio: float = 0.1, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+    
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+    
+    def try_withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
@@ -0,0 +1,64 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+import functools
+
+class SingleFlight:
+    """
+    یکی کردن فراخوانی‌های همزمان با کلید یکسان
+    تا وقتی درخواستی برای یک کلید در جریان است، بقیه منتظر همان می‌مانند
+    و همه نتیجه (یا خطای) یکسان می‌گیرند. اگر همه منتظرها لغو شوند
+    درخواست مشترک هم لغو می‌شود (کسی منتظر نتیجه‌اش نیست).
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._waiters: Dict[asyncio.Future, int] = {}
+        self.counters = {"calls": 0, "coalesced": 0}
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.counters["calls"] += 1
+        task = self._calls.get(key)
+        
+        if task is None:
+            # درخواست اصلی به صورت task جدا اجرا می‌شود تا لغو شدن
+            # یکی از منتظرها (مثلاً با wait_for) بقیه را لغو نکند
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(functools.partial(self._forget, key))
+        else:
+            self.counters["coalesced"] += 1
+        
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    # آخرین منتظر لغو شد (مثلاً iter_search متوقف شد یا کلاینت رفت)
+                    if self._calls.get(key) is task:
+                        del self._calls[key]
+                    task.cancel()
+    
+    def in_flight(self) -> int:
+        return len(self._calls)
+    
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # جلوگیری از هشدار "exception was never retrieved" وقتی همه منتظرها رفته‌اند
+            task.exception()
+
+def coalesce(method):
+    """
+    دکوریتور متدهای پلتفرم: فراخوانی‌های همزمان با آرگومان‌های یکسان
+    روی یک درخواست بالادستی سوار می‌شوند (self.inflight)
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        return await self.inflight.do(key, lambda: method(self, *args, **kwargs))
+    
+    return wrapper
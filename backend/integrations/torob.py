@@ -1,68 +1,89 @@
 from typing import List, Dict, Optional
 import httpx
 from .base import BasePlatform
+from .single_flight import coalesce
+from .resilience import PlatformError
+from .records import Listing
 
 class TorobIntegration(BasePlatform):
     """
     اتصال به ترب (مقایسه قیمت)
     """
     
-    def __init__(self, api_key: str = "", commission_rate: float = 0.10):
-        super().__init__("torob", "https://torob.com", commission_rate)
+    def __init__(self, api_key: str = "", commission_rate: float = 0.10, http_options: Optional[Dict] = None):
+        super().__init__("torob", "https://torob.com", commission_rate, http_options)
         self.api_key = api_key
         self.api_base = "https://api.torob.com/v4"
     
-    async def search_product(self, query: str) -> List[Dict]:
+    @coalesce
+    async def search_product(self, query: str, page: int = 1) -> List[Listing]:
         """جستجو در ترب"""
         await self.init_session()
         
         url = f"{self.api_base}/search/"
-        params = {"q": query}
+        params = {"q": query, "page": page}
         headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
         
-        try:
-            response = await self.session.get(url, params=params, headers=headers)
-            data = response.json()
-            
-            products = []
-            if "results" in data:
-                for item in data["results"]:
-                    products.append({
-                        "id": str(item.get("web_client_absolute_url", "").split("/")[-1]),
-                        "title": item.get("name1"),
-                        "price": item.get("price", {}).get("min", 0) / 10,
-                        "image": item.get("image_url"),
-                        "url": f"{self.base_url}{item.get('web_client_absolute_url')}",
-                        "platform": self.name
-                    })
-            
-            return products
-        except Exception as e:
-            print(f"Torob search error: {e}")
-            return []
+        def parse(response: httpx.Response) -> List[Listing]:
+            try:
+                data = response.json()
+                
+                products = []
+                if "results" in data:
+                    for item in data["results"]:
+                        products.append(Listing(
+                            id=str(item.get("web_client_absolute_url", "").split("/")[-1]),
+                            platform=self.name,
+                            title=item.get("name1"),
+                            price=item.get("price", {}).get("min", 0) / 10,
+                            image=item.get("image_url"),
+                            url=f"{self.base_url}{item.get('web_client_absolute_url')}",
+                            affiliate_url=f"{self.base_url}{item.get('web_client_absolute_url')}"
+                        ))
+                
+                return products
+            except Exception as e:
+                raise PlatformError(f"Torob search parse error: {e}") from e
+        
+        return await self.get_parsed(url, parse, params=params, headers=headers)
     
+    @coalesce
     async def get_product_details(self, product_id: str) -> Optional[Dict]:
         await self.init_session()
         
         url = f"{self.api_base}/product/{product_id}/"
         headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
         
-        try:
-            response = await self.session.get(url, headers=headers)
-            data = response.json()
+        def parse(response: httpx.Response) -> Optional[Dict]:
+            if response.status_code == 404:
+                return None
             
-            return {
-                "id": product_id,
-                "title": data.get("name1"),
-                "description": data.get("description"),
-                "price": data.get("price", {}).get("min", 0) / 10,
-                "images": [data.get("image_url")],
-                "platform": self.name
-            }
-        except Exception as e:
-            print(f"Torob product details error: {e}")
-            return None
+            try:
+                data = response.json()
+                
+                return {
+                    "id": product_id,
+                    "title": data.get("name1"),
+                    "description": data.get("description"),
+                    "price": data.get("price", {}).get("min", 0) / 10,
+                    "images": [data.get("image_url")],
+                    "platform": self.name
+                }
+            except Exception as e:
+                raise PlatformError(f"Torob product details parse error: {e}") from e
+        
+        return await self.get_parsed(url, parse, headers=headers)
     
+    @coalesce
     async def get_price(self, product_id: str) -> Optional[float]:
-        details = await self.get_product_details(product_id)
-        return details.get("price") if details else None
+        """دریافت قیمت فعلی (درخواست شرطی، فقط فیلد قیمت خوانده می‌شود)"""
+        url = f"{self.api_base}/product/{product_id}/"
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        
+        def parse(response: httpx.Response) -> float:
+            try:
+                return response.json().get("price", {}).get("min", 0) / 10
+            except Exception as e:
+                raise PlatformError(f"Torob price parse error: {e}") from e
+        
+        return await self.get_conditional(url, parse, headers=headers)
@@ -1,26 +1,63 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 import uvicorn
 from typing import List, Optional
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 load_dotenv("config/.env")
 
-from api.routes import products, orders, users, platforms, dashboard
-from core.database import engine, Base
+from api.routes import products, orders, users, platforms, dashboard, jobs
+from core.database import engine, async_engine, Base, close_async_db
+from core.query_stats import (
+    QUERY_COUNT_HEADER, QUERY_TIME_HEADER, QueryMetrics, instrument_engine, start_query_stats
+)
 from core.config import settings
+from core.redis import get_redis, close_redis
+from integrations.parsing import configure_parser_pool, shutdown_parser_pool
+from services.platform_selector import PlatformSelector
+from services.search_cache import SearchCache
+from services.browser_pool import close_browser_pool
 
-# Create database tables
+# Create database tables (sync engine; API requests use the async engine)
 Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_parser_pool(settings.PARSER_POOL, settings.PARSER_WORKERS)
+    
+    # Shared platform clients (connection pools live for the whole app)
+    cache = None
+    if settings.SEARCH_CACHE_ENABLED:
+        cache = SearchCache(
+            redis_client=get_redis(),
+            max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+            default_ttl=settings.SEARCH_CACHE_TTL,
+            ttls=settings.SEARCH_CACHE_TTLS,
+            stale_ttl=settings.SEARCH_CACHE_STALE_TTL
+        )
+    app.state.platform_selector = PlatformSelector(cache=cache)
+    await app.state.platform_selector.init_all()
+    try:
+        yield
+    finally:
+        await app.state.platform_selector.close_all()
+        await close_browser_pool()
+        await close_redis()
+        await close_async_db()
+        shutdown_parser_pool()
+
 app = FastAPI(
     title="DOT SHOP API",
     description="فروشگاه نقطه - امپراتوری فروش شخصی چند پلتفرمی",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    # orjson encodes responses (incl. datetimes, UTF-8) much faster than json.dumps
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS Configuration
@@ -30,14 +67,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[QUERY_COUNT_HEADER, QUERY_TIME_HEADER],
 )
 
+# SQL instrumentation: statement count / DB time per request and N+1 warnings
+query_metrics = QueryMetrics(n_plus_one_threshold=settings.SQL_N_PLUS_ONE_THRESHOLD)
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    instrument_engine(async_engine.sync_engine)
+    instrument_engine(engine)
+    
+    @app.middleware("http")
+    async def sql_instrumentation(request: Request, call_next):
+        stats = start_query_stats()
+        response = await call_next(request)
+        route = request.scope.get("route")
+        query_metrics.observe(f"{request.method} {route.path if route else '<unmatched>'}", stats)
+        response.headers[QUERY_COUNT_HEADER] = str(stats.count)
+        response.headers[QUERY_TIME_HEADER] = f"{stats.duration * 1000:.2f}"
+        return response
+
 # Include routers
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(products.router, prefix="/api/products", tags=["products"])
 app.include_router(orders.router, prefix="/api/orders", tags=["orders"])
 app.include_router(platforms.router, prefix="/api/platforms", tags=["platforms"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
 
 @app.get("/")
 async def root():
@@ -55,6 +110,15 @@ async def health_check():
         "redis": "connected"
     }
 
+@app.get("/metrics/db")
+async def db_metrics():
+    """آمار دیتابیس هر route (تعداد statement، زمان و موارد N+1)"""
+    return {
+        "enabled": settings.SQL_INSTRUMENTATION_ENABLED,
+        "n_plus_one_threshold": query_metrics.n_plus_one_threshold,
+        "routes": query_metrics.snapshot()
+    }
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
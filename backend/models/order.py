@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, JSON, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Enum, JSON, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -21,6 +21,12 @@ class PaymentStatus(str, enum.Enum):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # keyset pagination روی (created_at, id)، با و بدون فیلتر کاربر/وضعیت
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_user_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_orders_status_created_at_id", "status", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     order_number = Column(String, unique=True, index=True)
@@ -96,3 +102,20 @@ class OrderItem(Base):
     platform_product_id = Column(String)
     commission_rate = Column(Float)
     commission_amount = Column(Float)
+
+class DailySales(Base):
+    """
+    خلاصه فروش روزانه به تفکیک پلتفرم (fulfilled_by سفارش)
+    با ثبت سفارش و تغییر وضعیت آن به صورت افزایشی به‌روز می‌شود؛ داشبورد فقط از این جدول می‌خواند.
+    """
+    __tablename__ = "daily_sales"
+    
+    day = Column(Date, primary_key=True)  # UTC
+    platform = Column(String, primary_key=True)
+    
+    orders = Column(Integer, nullable=False, default=0)  # همه سفارش‌ها (با لغوشده‌ها)
+    cancelled_orders = Column(Integer, nullable=False, default=0)
+    sales = Column(Float, nullable=False, default=0)  # بدون سفارش‌های لغوشده
+    commission = Column(Float, nullable=False, default=0)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,61 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Boolean, UniqueConstraint
+from datetime import datetime
+from core.database import Base
+
+class PartnerOrder(Base):
+    """
+    سفارش ثبت‌شده در پنل همکاری یک vendor (مثلاً میهن استور)؛ یکتا روی (vendor, order_id)
+    """
+    __tablename__ = "partner_orders"
+    __table_args__ = (
+        UniqueConstraint("vendor", "order_id", name="uq_partner_orders_vendor_order"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    vendor = Column(String, nullable=False)
+    order_id = Column(String, nullable=False)
+
+    product = Column(String)
+    commission_amount = Column(Integer, default=0)  # تومان
+    order_date = Column(String, index=True)  # تاریخ شمسی YYYY-MM-DD
+    tracking_code = Column(String)
+    status = Column(String)
+    data = Column(JSON)  # Raw row from the partner panel
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SyncWatermark(Base):
+    """
+    آخرین نقطه همگام‌سازی هر vendor (جدیدترین سفارش دیده‌شده)
+    """
+    __tablename__ = "sync_watermarks"
+
+    vendor = Column(String, primary_key=True)
+    last_order_id = Column(String)
+    last_order_date = Column(String)  # تاریخ شمسی YYYY-MM-DD
+    stats = Column(JSON)  # آخرین آمار داشبورد
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SyncRun(Base):
+    """
+    گزارش هر اجرای همگام‌سازی: مدت، صفحه‌ها و تعداد ردیف‌ها
+    """
+    __tablename__ = "sync_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    vendor = Column(String, nullable=False, index=True)
+    full = Column(Boolean, default=False)
+    success = Column(Boolean, default=False)
+    error = Column(String)
+
+    pages = Column(Integer, default=0)
+    fetched = Column(Integer, default=0)
+    inserted = Column(Integer, default=0)
+    updated = Column(Integer, default=0)
+    unchanged = Column(Integer, default=0)
+
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+    duration = Column(Float)  # ثانیه
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, JSON, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from core.database import Base
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # keyset pagination روی id در یک دسته‌بندی
+        Index("ix_products_category_id_id", "category_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False, index=True)
@@ -31,7 +35,7 @@ class Product(Base):
     meta_description = Column(Text)
     meta_keywords = Column(String)
     
-    # Platform availability
+    # Platform availability (legacy snapshot; lookups use ProductListing)
     platforms = Column(JSON)  # {"digikala": {...}, "mihanstore": {...}}
     
     # Stats
@@ -44,6 +48,35 @@ class Product(Base):
     
     # Relationships
     orders = relationship("OrderItem", back_populates="product")
+    listings = relationship("ProductListing", back_populates="product", cascade="all, delete-orphan")
+
+class ProductListing(Base):
+    """
+    حضور یک محصول در یک پلتفرم؛ یکتا روی (platform, platform_product_id)
+    """
+    __tablename__ = "product_listings"
+    __table_args__ = (
+        UniqueConstraint("platform", "platform_product_id", name="uq_product_listings_platform_product"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
+    product = relationship("Product", back_populates="listings")
+    
+    platform = Column(String, nullable=False)
+    platform_product_id = Column(String, nullable=False)
+    
+    title = Column(String)
+    price = Column(Float)
+    in_stock = Column(Boolean, default=True)
+    url = Column(String)
+    affiliate_url = Column(String)
+    image = Column(String)
+    data = Column(JSON)  # Raw item from the platform
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class Category(Base):
     __tablename__ = "categories"
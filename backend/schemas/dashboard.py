@@ -0,0 +1,29 @@
+from typing import List
+from pydantic import BaseModel
+from schemas.product import ProductSummary
+
+class TodayStats(BaseModel):
+    orders: int
+    sales: float
+    commission: float
+
+class WeekStats(BaseModel):
+    orders: int
+
+class TotalStats(BaseModel):
+    products: int
+    users: int
+
+class DashboardStats(BaseModel):
+    today: TodayStats
+    week: WeekStats
+    totals: TotalStats
+
+class SalesChart(BaseModel):
+    labels: List[str]
+    sales: List[float]
+    commissions: List[float]
+    orders: List[int]
+
+class TopProducts(BaseModel):
+    products: List[ProductSummary]
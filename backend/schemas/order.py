@@ -0,0 +1,76 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict
+from models.order import OrderStatus, PaymentStatus
+
+class OrderItemOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    product_id: Optional[int] = None
+    product_name: Optional[str] = None
+    product_image: Optional[str] = None
+    quantity: Optional[int] = None
+    unit_price: Optional[float] = None
+    total_price: Optional[float] = None
+    platform: Optional[str] = None
+    commission_rate: Optional[float] = None
+    commission_amount: Optional[float] = None
+
+class OrderSummary(BaseModel):
+    """ستون‌های سفارش برای لیست‌ها (بدون آیتم‌ها)"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    order_number: str
+    user_id: Optional[int] = None
+    status: Optional[OrderStatus] = None
+    payment_status: Optional[PaymentStatus] = None
+    subtotal: float
+    shipping_cost: Optional[float] = None
+    discount: Optional[float] = None
+    total: float
+    commission_amount: Optional[float] = None
+    fulfilled_by: Optional[str] = None
+    tracking_number: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class OrderDetail(OrderSummary):
+    """جزئیات سفارش؛ items باید eager load شده باشد"""
+    tax: Optional[float] = None
+    shipping_address: Optional[Dict[str, Any]] = None
+    payment_method: Optional[str] = None
+    payment_gateway: Optional[str] = None
+    transaction_id: Optional[str] = None
+    source_platform: Optional[str] = None
+    customer_notes: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    paid_at: Optional[datetime] = None
+    shipped_at: Optional[datetime] = None
+    delivered_at: Optional[datetime] = None
+    items: List[OrderItemOut] = []
+
+class OrderPage(BaseModel):
+    orders: List[OrderSummary]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+class OrderTracking(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    order_number: str
+    status: Optional[OrderStatus] = None
+    tracking_number: Optional[str] = None
+    created_at: Optional[datetime] = None
+    items: List[OrderItemOut] = []
+
+class OrderCreated(BaseModel):
+    success: bool
+    order_number: str
+    order_id: int
+    total: float
+    commission: float
+
+class OrderStatusUpdated(BaseModel):
+    success: bool
+    status: OrderStatus
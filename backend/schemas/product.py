@@ -0,0 +1,64 @@
+from datetime import datetime
+from typing import Any, List, Optional
+from pydantic import BaseModel, ConfigDict
+
+class CategoryOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    slug: Optional[str] = None
+    parent_id: Optional[int] = None
+    icon: Optional[str] = None
+    image: Optional[str] = None
+    description: Optional[str] = None
+
+class ProductListingOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    platform: str
+    platform_product_id: str
+    title: Optional[str] = None
+    price: Optional[float] = None
+    in_stock: Optional[bool] = None
+    url: Optional[str] = None
+    affiliate_url: Optional[str] = None
+    image: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+class ProductSummary(BaseModel):
+    """ستون‌های سبک محصول برای لیست‌ها (بدون JSON و رابطه‌ها)"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    slug: Optional[str] = None
+    price: float
+    original_price: Optional[float] = None
+    discount_percent: Optional[float] = None
+    main_image: Optional[str] = None
+    category_id: Optional[int] = None
+    in_stock: Optional[bool] = None
+    views: Optional[int] = None
+    sales_count: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+class ProductDetail(ProductSummary):
+    """جزئیات محصول؛ category و listings باید eager load شده باشند"""
+    description: Optional[str] = None
+    images: Optional[List[Any]] = None
+    quantity: Optional[int] = None
+    meta_title: Optional[str] = None
+    meta_description: Optional[str] = None
+    meta_keywords: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    category: Optional[CategoryOut] = None
+    listings: List[ProductListingOut] = []
+
+class ProductPage(BaseModel):
+    products: List[ProductSummary]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+class CategoryList(BaseModel):
+    categories: List[CategoryOut]
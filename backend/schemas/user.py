@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, ConfigDict
+from models.user import UserRole
+
+class UserOut(BaseModel):
+    """اطلاعات عمومی کاربر (بدون password_hash)"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    full_name: Optional[str] = None
+    avatar: Optional[str] = None
+    role: Optional[UserRole] = None
+    is_active: Optional[bool] = None
+    is_verified: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    last_login: Optional[datetime] = None
+
+class AuthUser(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    phone: Optional[str] = None
+    full_name: Optional[str] = None
+    role: Optional[UserRole] = None
+
+class AuthResponse(BaseModel):
+    success: bool
+    user: AuthUser
+    token: str
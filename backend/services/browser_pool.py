@@ -0,0 +1,212 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+from core.config import settings
+
+# config/settings.json در ریشه مخزن
+DEFAULT_SETTINGS_FILE = Path(__file__).resolve().parents[2] / "config" / "settings.json"
+
+def load_vendor_config(path: str = "") -> Dict[str, Dict]:
+    """
+    تنظیمات مرورگر هر vendor از بخش platforms فایل settings.json
+    هر vendor یا user_data_dir (پروفایل پایدار) دارد یا storage_state (کوکی‌های ذخیره‌شده)؛
+    max_pages و recycle_after اختیاری‌اند.
+    """
+    path = Path(path) if path else DEFAULT_SETTINGS_FILE
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("platforms", {})
+
+class _Lease:
+    """یک context باز و شمارنده‌های استفاده از آن"""
+
+    def __init__(self, context, browser=None):
+        self.context = context
+        self.browser = browser
+        self.uses = 0
+        self.active = 0
+
+class _Vendor:
+    def __init__(self, name: str, config: Dict, max_pages: int, recycle_after: int, headless: bool):
+        self.name = name
+        self.config = config
+        self.user_data_dir = config.get("user_data_dir")
+        self.storage_state = config.get("storage_state")
+        self.headless = config.get("headless", headless)
+        self.recycle_after = config.get("recycle_after", recycle_after)
+        self.semaphore = asyncio.Semaphore(config.get("max_pages", max_pages))
+        self.condition = asyncio.Condition()
+        self.lease: Optional[_Lease] = None
+        self.opened = 0
+        self.recycled = 0
+
+class BrowserPool:
+    """
+    pool مرورگرهای Playwright برای اتوماسیون vendorها
+    - vendorهای با storage_state در چند مرورگر مشترک و بلندمدت context می‌گیرند
+    - vendorهای با user_data_dir یک persistent context جدا دارند (قفل پروفایل کروم)
+    هر vendor سقف صفحه همزمان دارد و context بعد از recycle_after بار استفاده
+    (پس از تمام شدن صفحه‌های باز) بسته و دوباره ساخته می‌شود.
+    """
+
+    def __init__(
+        self,
+        vendors: Optional[Dict[str, Dict]] = None,
+        browsers: int = 2,
+        max_pages: int = 2,
+        recycle_after: int = 50,
+        headless: bool = True
+    ):
+        self.browser_count = browsers
+        self.headless = headless
+        self.vendors = {
+            name: _Vendor(name, config, max_pages, recycle_after, headless)
+            for name, config in (vendors or {}).items()
+        }
+        self._playwright = None
+        self._browsers: List = []
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        async with self._lock:
+            if self._playwright is None:
+                from playwright.async_api import async_playwright
+                self._playwright = await async_playwright().start()
+
+    async def close(self):
+        """بستن همه contextها (با ذخیره storage_state) و مرورگرها"""
+        for vendor in self.vendors.values():
+            async with vendor.condition:
+                if vendor.lease is not None:
+                    await self._close_lease(vendor, vendor.lease)
+                    vendor.lease = None
+        for browser in self._browsers:
+            await browser.close()
+        self._browsers = []
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    @asynccontextmanager
+    async def page(self, vendor_name: str) -> AsyncIterator:
+        """
+        یک صفحه در context همان vendor
+        async with pool.page("divar") as page: ...
+        """
+        if vendor_name not in self.vendors:
+            raise KeyError(f"Unknown browser vendor: {vendor_name}")
+        vendor = self.vendors[vendor_name]
+
+        async with vendor.semaphore:
+            lease = await self._acquire(vendor)
+            page = None
+            try:
+                try:
+                    page = await lease.context.new_page()
+                except Exception:
+                    # context خراب (مثلاً مرورگر بسته شده): درخواست بعدی context تازه بگیرد
+                    lease.uses = max(lease.uses, vendor.recycle_after)
+                    raise
+                yield page
+            finally:
+                if page is not None:
+                    try:
+                        await page.close()
+                    except Exception as e:
+                        print(f"Browser page close error ({vendor_name}): {e}")
+                async with vendor.condition:
+                    lease.active -= 1
+                    vendor.condition.notify_all()
+
+    def stats(self) -> Dict[str, Dict]:
+        return {
+            name: {
+                "open": vendor.lease is not None,
+                "uses": vendor.lease.uses if vendor.lease else 0,
+                "active_pages": vendor.lease.active if vendor.lease else 0,
+                "contexts_opened": vendor.opened,
+                "contexts_recycled": vendor.recycled
+            }
+            for name, vendor in self.vendors.items()
+        }
+
+    async def _acquire(self, vendor: _Vendor) -> _Lease:
+        async with vendor.condition:
+            lease = vendor.lease
+            if lease is not None and lease.uses >= vendor.recycle_after:
+                # صفحه‌های باز context قبلی اول تمام شوند
+                await vendor.condition.wait_for(lambda: lease.active == 0 or vendor.lease is not lease)
+                if vendor.lease is lease:
+                    await self._close_lease(vendor, lease)
+                    vendor.lease = None
+                    vendor.recycled += 1
+
+            if vendor.lease is None:
+                vendor.lease = await self._open_lease(vendor)
+                vendor.opened += 1
+
+            vendor.lease.uses += 1
+            vendor.lease.active += 1
+            return vendor.lease
+
+    async def _open_lease(self, vendor: _Vendor) -> _Lease:
+        await self.start()
+        chromium = self._playwright.chromium
+
+        if vendor.user_data_dir:
+            Path(vendor.user_data_dir).mkdir(parents=True, exist_ok=True)
+            context = await chromium.launch_persistent_context(
+                vendor.user_data_dir, headless=vendor.headless
+            )
+            return _Lease(context)
+
+        browser = await self._browser()
+        state = vendor.storage_state
+        context = await browser.new_context(
+            storage_state=state if state and Path(state).exists() else None
+        )
+        return _Lease(context, browser)
+
+    async def _close_lease(self, vendor: _Vendor, lease: _Lease):
+        try:
+            if vendor.storage_state and not vendor.user_data_dir:
+                Path(vendor.storage_state).parent.mkdir(parents=True, exist_ok=True)
+                await lease.context.storage_state(path=vendor.storage_state)
+            await lease.context.close()
+        except Exception as e:
+            print(f"Browser context close error ({vendor.name}): {e}")
+
+    async def _browser(self):
+        """مرورگر مشترک با کمترین context باز"""
+        async with self._lock:
+            self._browsers = [b for b in self._browsers if b.is_connected()]
+            busy = all(b.contexts for b in self._browsers)
+            if busy and len(self._browsers) < self.browser_count:
+                self._browsers.append(
+                    await self._playwright.chromium.launch(headless=self.headless)
+                )
+            return min(self._browsers, key=lambda b: len(b.contexts))
+
+_pool: Optional[BrowserPool] = None
+
+def get_browser_pool() -> BrowserPool:
+    """pool مشترک پروسه (مرورگرها با اولین page باز می‌شوند)"""
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool(
+            vendors=load_vendor_config(settings.BROWSER_SETTINGS_FILE),
+            browsers=settings.BROWSER_POOL_SIZE,
+            max_pages=settings.BROWSER_MAX_PAGES_PER_VENDOR,
+            recycle_after=settings.BROWSER_RECYCLE_AFTER,
+            headless=settings.BROWSER_HEADLESS
+        )
+    return _pool
+
+async def close_browser_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
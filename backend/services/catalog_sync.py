@@ -0,0 +1,206 @@
+from typing import Dict, Iterable, List, Sequence
+import csv
+import io
+import json
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from models.product import Product, ProductListing
+from integrations.records import Listing
+
+# ستون‌هایی که تغییرشان یعنی listing باید به‌روزرسانی شود
+TRACKED_COLUMNS = ("title", "price", "in_stock", "url", "affiliate_url", "image")
+LISTING_COLUMNS = ("product_id", "platform", "platform_product_id", *TRACKED_COLUMNS, "data")
+
+def listing_from_item(platform: str, item: Listing) -> Dict:
+    """ستون‌های ProductListing از یک آیتم نتیجه جستجو"""
+    return {
+        "platform": platform,
+        "platform_product_id": item.id,
+        "title": item.title,
+        "price": item.price,
+        "in_stock": item.in_stock,
+        "url": item.url,
+        "affiliate_url": item.affiliate_url or item.url,
+        "image": item.image,
+        "data": item.to_dict()
+    }
+
+def sync_product_prices(db: Session, product_ids: Iterable[int]):
+    """قیمت محصول = کمترین قیمت listingهای آن"""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+    
+    db.execute(
+        update(Product)
+        .where(Product.id.in_(product_ids))
+        .values(price=select(func.min(ProductListing.price)).where(
+            ProductListing.product_id == Product.id
+        ).scalar_subquery())
+        .execution_options(synchronize_session=False)
+    )
+
+def chunks(rows: List, size: int):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def upsert_statement(db: Session, model, keys: Sequence[str], columns: Sequence[str]):
+    """INSERT ... ON CONFLICT (keys) DO UPDATE برای columns و updated_at"""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(model)
+    return stmt.on_conflict_do_update(
+        index_elements=[getattr(model, key) for key in keys],
+        set_={
+            **{column: stmt.excluded[column] for column in columns},
+            "updated_at": func.now()
+        }
+    )
+
+def _claim_statement(db: Session):
+    """
+    INSERT listing ... ON CONFLICT DO NOTHING RETURNING: فقط ردیف‌هایی که واقعاً درج شدند برمی‌گردند
+    (sync همزمان دیگری که همان listing را زودتر درج کرده باشد برنده است)
+    """
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(ProductListing).on_conflict_do_nothing(
+        index_elements=[ProductListing.platform, ProductListing.platform_product_id]
+    ).returning(ProductListing.platform_product_id, ProductListing.product_id)
+
+def _upsert_statement(db: Session):
+    return upsert_statement(
+        db, ProductListing, ("platform", "platform_product_id"), (*TRACKED_COLUMNS, "data")
+    )
+
+def _copy_upsert(db: Session, rows: List[Dict]):
+    """
+    بارگذاری خیلی بزرگ: COPY به جدول موقت و سپس یک INSERT ... SELECT ... ON CONFLICT
+    """
+    connection = db.connection().connection  # DBAPI (psycopg2)
+    cursor = connection.cursor()
+    columns = ", ".join(LISTING_COLUMNS)
+    
+    cursor.execute(
+        "CREATE TEMP TABLE IF NOT EXISTS product_listings_stage "
+        "(LIKE product_listings INCLUDING DEFAULTS) ON COMMIT DROP"
+    )
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            json.dumps(row[column], ensure_ascii=False) if column == "data"
+            else ("" if row[column] is None else row[column])
+            for column in LISTING_COLUMNS
+        ])
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY product_listings_stage ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    
+    updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in (*TRACKED_COLUMNS, "data"))
+    cursor.execute(
+        f"INSERT INTO product_listings ({columns}) "
+        f"SELECT {columns} FROM product_listings_stage "
+        f"ON CONFLICT (platform, platform_product_id) DO UPDATE SET {updates}, updated_at = now()"
+    )
+    cursor.execute("TRUNCATE product_listings_stage")
+
+def upsert_items(
+    db: Session,
+    platform: str,
+    items: Iterable[Listing],
+    chunk_size: int = 500,
+    copy_threshold: int = 5000
+) -> Dict[str, int]:
+    """
+    درج/به‌روزرسانی انبوه نتایج یک پلتفرم
+    1. یک کوئری دسته‌ای برای listingهای موجود
+    2. ساخت محصولات جدید با INSERT ... RETURNING دسته‌ای و گرفتن listingهایشان با
+       ON CONFLICT DO NOTHING؛ محصول listingهایی که sync همزمان دیگری زودتر گرفته در همین
+       تراکنش حذف می‌شود (محصول بی‌listing نمی‌ماند و inserted دو بار شمرده نمی‌شود)
+    3. INSERT ... ON CONFLICT DO UPDATE برای listingهای تغییرکرده (بالای copy_threshold ردیف با COPY)
+    """
+    by_id = {item.id: item for item in items}
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+    if not by_id:
+        return stats
+    
+    existing = {}
+    for ids in chunks(list(by_id), 1000):
+        rows = db.execute(
+            select(ProductListing.platform_product_id, ProductListing.product_id, *[
+                getattr(ProductListing, column) for column in TRACKED_COLUMNS
+            ]).where(
+                ProductListing.platform == platform,
+                ProductListing.platform_product_id.in_(ids)
+            )
+        ).all()
+        existing.update({row[0]: row for row in rows})
+    
+    new_items = []
+    listing_rows = []
+    changed_product_ids = set()
+    for platform_product_id, item in by_id.items():
+        listing = listing_from_item(platform, item)
+        row = existing.get(platform_product_id)
+        if row is None:
+            new_items.append((item, listing))
+            continue
+        if tuple(row[2:]) == tuple(listing[column] for column in TRACKED_COLUMNS):
+            stats["unchanged"] += 1
+            continue
+        listing_rows.append({"product_id": row[1], **listing})
+        changed_product_ids.add(row[1])
+        stats["updated"] += 1
+    
+    lost = []
+    for chunk in chunks(new_items, chunk_size):
+        product_ids = db.scalars(
+            insert(Product).returning(Product.id, sort_by_parameter_order=True),
+            [
+                {
+                    "title": item.title,
+                    "price": item.price,
+                    "main_image": item.image,
+                    "in_stock": item.in_stock,
+                    "platforms": {platform: listing["data"]}
+                }
+                for item, listing in chunk
+            ]
+        ).all()
+        claimed = dict(db.execute(
+            _claim_statement(db),
+            [{"product_id": product_id, **listing} for product_id, (_, listing) in zip(product_ids, chunk)]
+        ).all())
+        stats["inserted"] += len(claimed)
+        
+        unclaimed = [
+            (product_id, listing)
+            for product_id, (_, listing) in zip(product_ids, chunk)
+            if listing["platform_product_id"] not in claimed
+        ]
+        if unclaimed:
+            db.execute(delete(Product).where(Product.id.in_([product_id for product_id, _ in unclaimed])))
+            lost.extend(listing for _, listing in unclaimed)
+    
+    # listingهایی که sync دیگری ساخت: مثل listing موجود به‌روزرسانی می‌شوند
+    for chunk in chunks(lost, 1000):
+        owners = dict(db.execute(
+            select(ProductListing.platform_product_id, ProductListing.product_id).where(
+                ProductListing.platform == platform,
+                ProductListing.platform_product_id.in_([listing["platform_product_id"] for listing in chunk])
+            )
+        ).all())
+        for listing in chunk:
+            listing_rows.append({"product_id": owners[listing["platform_product_id"]], **listing})
+            changed_product_ids.add(owners[listing["platform_product_id"]])
+            stats["updated"] += 1
+    
+    if len(listing_rows) >= copy_threshold and db.get_bind().dialect.name == "postgresql":
+        _copy_upsert(db, listing_rows)
+    else:
+        for chunk in chunks(listing_rows, chunk_size):
+            db.execute(_upsert_statement(db), chunk)
+    
+    sync_product_prices(db, changed_product_ids)
+    db.commit()
+    return stats
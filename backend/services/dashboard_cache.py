@@ -0,0 +1,108 @@
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+import json
+from core.config import settings
+from core.redis import get_redis
+
+class DashboardCache:
+    """
+    کش Redis برای endpointهای داشبورد
+    - آمار: کل پاسخ برای روز جاری؛ با ثبت/تغییر سفارش، محصول یا کاربر پاک می‌شود (ttl فقط پشتیبان است)
+    - پرفروش‌ها: sorted set شناسه محصول -> sales_count که با ثبت هر سفارش افزایشی به‌روز می‌شود
+    خطای Redis هیچ‌وقت endpoint را از کار نمی‌اندازد؛ در آن صورت از دیتابیس خوانده می‌شود.
+    """
+
+    def __init__(self, redis_client, ttl: float = 300, top_ttl: float = 3600, prefix: str = "dashboard"):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.top_ttl = top_ttl
+        self.prefix = prefix
+        self.top_key = f"{prefix}:top_products"
+        # نبودِ این کلید یعنی sorted set باید از دیتابیس بازسازی شود (شروع سرد، flush یا پایان top_ttl)
+        self.top_ready_key = f"{prefix}:top_products:ready"
+        self.top_rebuild_key = f"{prefix}:top_products:rebuild"
+        self.top_lock_key = f"{prefix}:top_products:lock"
+
+    def stats_key(self) -> str:
+        return f"{self.prefix}:stats:{datetime.utcnow().date()}"
+
+    async def get_stats(self) -> Optional[Dict]:
+        try:
+            raw = await self.redis.get(self.stats_key())
+        except Exception as e:
+            print(f"Dashboard cache redis error: {e}")
+            return None
+        return json.loads(raw) if raw else None
+
+    async def set_stats(self, stats: Dict):
+        try:
+            await self.redis.set(self.stats_key(), json.dumps(stats, default=str), ex=int(self.ttl))
+        except Exception as e:
+            print(f"Dashboard cache redis error: {e}")
+
+    async def invalidate_stats(self):
+        try:
+            await self.redis.delete(self.stats_key())
+        except Exception as e:
+            print(f"Dashboard cache redis error: {e}")
+
+    async def record_sales(self, quantities: Dict[int, int]):
+        """
+        افزایش امتیاز محصولات سفارش ثبت‌شده (بعد از commit افزایش sales_count در دیتابیس)
+        اگر sorted set هنوز ساخته نشده، بازسازی بعدی همین مقادیر را از دیتابیس می‌خواند.
+        """
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for product_id, quantity in quantities.items():
+                    pipe.zincrby(self.top_key, quantity, product_id)
+                pipe.delete(self.stats_key())
+                await pipe.execute()
+        except Exception as e:
+            print(f"Dashboard cache redis error: {e}")
+
+    async def top_product_ids(
+        self,
+        limit: int,
+        load: Callable[[], Awaitable[Iterable[Tuple[int, int]]]]
+    ) -> Optional[List[int]]:
+        """
+        شناسه پرفروش‌ترین محصولات از sorted set
+        load: (product_id, sales_count)های دیتابیس برای بازسازی؛ None یعنی از دیتابیس بخوانید
+        (Redis در دسترس نیست یا پروسه دیگری در حال بازسازی است).
+        """
+        try:
+            if not await self.redis.exists(self.top_ready_key) and not await self._rebuild_top(load):
+                return None
+            return [int(product_id) for product_id in await self.redis.zrevrange(self.top_key, 0, limit - 1)]
+        except Exception as e:
+            print(f"Dashboard cache redis error: {e}")
+            return None
+    
+    async def _rebuild_top(self, load: Callable[[], Awaitable[Iterable[Tuple[int, int]]]]) -> bool:
+        """
+        بازسازی sorted set از دیتابیس؛ فقط یک پروسه (قفل SET NX) و بدون لحظه خالی:
+        در کلید موقت ساخته و با RENAME جایگزین می‌شود. ready با top_ttl منقضی می‌شود تا
+        اختلاف احتمالی (افزایش‌های هم‌زمان با بازسازی) خودبه‌خود اصلاح شود.
+        """
+        if not await self.redis.set(self.top_lock_key, 1, nx=True, ex=60):
+            return False
+        try:
+            scores = {product_id: count for product_id, count in await load() if count}
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.delete(self.top_rebuild_key)
+                if scores:
+                    pipe.zadd(self.top_rebuild_key, scores)
+                    pipe.rename(self.top_rebuild_key, self.top_key)
+                else:
+                    pipe.delete(self.top_key)
+                pipe.set(self.top_ready_key, 1, ex=int(self.top_ttl))
+                await pipe.execute()
+            return True
+        finally:
+            await self.redis.delete(self.top_lock_key)
+
+def get_dashboard_cache() -> Optional[DashboardCache]:
+    """کش داشبورد روی کلاینت مشترک Redis (None اگر غیرفعال باشد)"""
+    if not settings.DASHBOARD_CACHE_ENABLED:
+        return None
+    return DashboardCache(get_redis(), ttl=settings.DASHBOARD_CACHE_TTL, top_ttl=settings.DASHBOARD_TOP_PRODUCTS_TTL)
@@ -0,0 +1,256 @@
+from typing import Any, Dict, Optional
+import asyncio
+import hashlib
+import inspect
+import json
+import threading
+import uuid
+from celery import states
+from celery.backends.redis import RedisBackend
+from celery.result import AsyncResult
+from celery.signals import worker_process_shutdown
+from redis.exceptions import WatchError
+from core.celery import celery_app
+from core.config import settings
+from core.database import SessionLocal
+
+QUEUED = "QUEUED"
+PROGRESS = "PROGRESS"
+ACTIVE_STATES = {QUEUED, states.RECEIVED, states.STARTED, PROGRESS, states.RETRY}
+
+# برای backendهای غیر Redis (cache+memory:// در تست‌ها) که SET NX ندارند؛ همان پروسه
+_claim_lock = threading.Lock()
+
+def job_params(name: str, params: Dict) -> Dict:
+    """
+    پارامترهای job با مقادیر پیش‌فرض task
+    {"vendor": "mihanstore"} و {"vendor": "mihanstore", "full": False} یک job هستند.
+    """
+    task = celery_app.tasks.get(name)
+    if task is None:
+        return dict(params)
+    defaults = {
+        parameter.name: parameter.default
+        for parameter in inspect.signature(task.run).parameters.values()
+        if parameter.default is not inspect.Parameter.empty
+    }
+    return {**defaults, **params}
+
+def dedupe_key(name: str, params: Dict) -> str:
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return f"jobs:dedupe:{name}:{digest}"
+
+def _decode(value) -> Optional[str]:
+    return value.decode() if isinstance(value, bytes) else value
+
+def _claim(key: str, job_id: str) -> Optional[str]:
+    """
+    ثبت اتمی job_id روی key (Redis: SET NX EX)
+    خروجی None یعنی ثبت شد؛ در غیر این صورت شناسه jobی که قبلاً ثبت شده است.
+    """
+    backend = celery_app.backend
+    if isinstance(backend, RedisBackend):
+        if backend.client.set(key, job_id, nx=True, ex=settings.JOB_RESULT_TTL):
+            return None
+        return _decode(backend.client.get(key))
+
+    with _claim_lock:
+        existing = _decode(backend.get(key))
+        if existing:
+            return existing
+        backend.set(key, job_id)
+        return None
+
+def _release(key: str, job_id: str):
+    """آزاد کردن key اگر هنوز به job_id (تمام‌شده) اشاره کند"""
+    backend = celery_app.backend
+    if isinstance(backend, RedisBackend):
+        # compare-and-delete با WATCH: اگر پروسه دیگری کلید را گرفته باشد حذف نمی‌شود
+        with backend.client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                if _decode(pipe.get(key)) == job_id:
+                    pipe.multi()
+                    pipe.delete(key)
+                    pipe.execute()
+            except WatchError:
+                pass
+        return
+
+    with _claim_lock:
+        if _decode(backend.get(key)) == job_id:
+            backend.delete(key)
+
+def submit_job(name: str, params: Optional[Dict] = None, priority: Optional[int] = None) -> Dict:
+    """
+    ثبت job در صف
+    اگر job یکسانی (همان نام و پارامترها) هنوز در صف یا در حال اجرا باشد،
+    همان برگردانده می‌شود و job جدید ساخته نمی‌شود.
+    کلید dedupe با SET NX گرفته می‌شود، پس بین چند پروسه API هم فقط یک job ثبت می‌شود.
+    """
+    params = job_params(name, params or {})
+    backend = celery_app.backend
+    key = dedupe_key(name, params)
+
+    job_id = str(uuid.uuid4())
+    # QUEUED قبل از گرفتن کلید ذخیره می‌شود: شناسه‌ای که روی کلید است همیشه وضعیت دارد
+    # (تا worker آن را بردارد PENDING با «ناشناخته» یکی است)
+    backend.store_result(job_id, {"name": name, "params": params}, QUEUED)
+
+    for _ in range(3):
+        existing = _claim(key, job_id)
+        if existing is None:
+            break
+        if AsyncResult(existing, app=celery_app).state in ACTIVE_STATES:
+            backend.forget(job_id)
+            return {"job_id": existing, "deduplicated": True}
+        # job قبلی تمام شده یا منقضی شده؛ کلید دوباره گرفته می‌شود
+        _release(key, existing)
+    else:
+        backend.forget(job_id)
+        raise RuntimeError(f"Could not claim job key: {key}")
+
+    celery_app.send_task(
+        name,
+        kwargs=params,
+        task_id=job_id,
+        priority=settings.JOB_DEFAULT_PRIORITY if priority is None else priority
+    )
+    return {"job_id": job_id, "deduplicated": False}
+
+def job_status(job_id: str) -> Dict:
+    """وضعیت، پیشرفت و نتیجه یک job"""
+    result = AsyncResult(job_id, app=celery_app)
+    state = result.state
+    info = result.info
+
+    status = {
+        "job_id": job_id,
+        "name": result.name,
+        "state": state,
+        "progress": None,
+        "result": None,
+        "error": None
+    }
+    if state == PROGRESS:
+        status["progress"] = info
+    elif state == QUEUED and isinstance(info, dict):
+        status["name"] = status["name"] or info.get("name")
+    elif state == states.SUCCESS:
+        status["result"] = info
+    elif state in states.EXCEPTION_STATES:
+        status["error"] = str(info)
+    return status
+
+def cancel_job(job_id: str) -> Dict:
+    celery_app.control.revoke(job_id, terminate=False)
+    celery_app.backend.store_result(job_id, None, states.REVOKED)
+    return job_status(job_id)
+
+# ---- worker side ----
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_selector = None
+
+def run_async(coro) -> Any:
+    """
+    اجرای coroutine روی event loop ماندگار پروسه worker
+    کلاینت‌های HTTP و browser pool بین jobها باز می‌مانند.
+    """
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+def get_selector():
+    global _selector
+    if _selector is None:
+        from services.platform_selector import PlatformSelector
+        _selector = PlatformSelector()
+    return _selector
+
+@worker_process_shutdown.connect
+def _shutdown(**kwargs):
+    if _loop is None:
+        return
+    from services.browser_pool import close_browser_pool
+    if _selector is not None:
+        run_async(_selector.close_all())
+    run_async(close_browser_pool())
+    _loop.close()
+
+@celery_app.task(name="control.sync_catalog", bind=True)
+def sync_catalog(self, platform: str, query: str, limit: int = 100) -> Dict:
+    """جستجوی چندصفحه‌ای در یک پلتفرم و upsert نتایج در کاتالوگ"""
+    from services.catalog_sync import upsert_items
+    from services.dashboard_cache import get_dashboard_cache
+    selector = get_selector()
+    if platform not in selector.platforms:
+        raise ValueError(f"Unknown platform: {platform}")
+
+    async def fetch():
+        items = []
+        async for item in selector.platforms[platform].iter_search(
+            query,
+            max_items=limit,
+            lookahead=settings.SEARCH_PAGE_LOOKAHEAD,
+            max_pages=settings.SEARCH_MAX_PAGES
+        ):
+            items.append(item)
+            if len(items) % 50 == 0:
+                self.update_state(state=PROGRESS, meta={"stage": "fetch", "done": len(items), "total": limit})
+        return items
+
+    results = run_async(fetch())
+    self.update_state(state=PROGRESS, meta={"stage": "upsert", "done": len(results), "total": len(results)})
+
+    db = SessionLocal()
+    try:
+        stats = upsert_items(db, platform, results)
+    finally:
+        db.close()
+    
+    # محصولات جدید تعداد کل محصولات داشبورد را تغییر می‌دهند
+    cache = get_dashboard_cache() if stats["inserted"] else None
+    if cache is not None:
+        run_async(cache.invalidate_stats())
+    return {"platform": platform, "query": query, "total_found": len(results), **stats}
+
+@celery_app.task(name="control.refresh_prices", bind=True)
+def refresh_prices(self, platform: Optional[str] = None, limit: Optional[int] = None) -> Dict:
+    """به‌روزرسانی انبوه قیمت listingها"""
+    from services.price_refresh import PriceRefreshService
+    self.update_state(state=PROGRESS, meta={"stage": "refresh"})
+    db = SessionLocal()
+    try:
+        return run_async(PriceRefreshService(get_selector()).refresh(db, platform=platform, limit=limit))
+    finally:
+        db.close()
+
+@celery_app.task(name="control.sync_partner_orders", bind=True)
+def sync_partner_orders(self, vendor: str = "mihanstore", full: bool = False) -> Dict:
+    """همگام‌سازی افزایشی سفارشات پنل همکاری"""
+    from integrations.mihanstore_partner import MihanstorePartnerClient
+    from services.browser_pool import get_browser_pool
+    from services.partner_sync import PartnerOrderSync
+    if vendor != "mihanstore":
+        raise ValueError(f"No partner connector for vendor: {vendor}")
+
+    self.update_state(state=PROGRESS, meta={"stage": "sync", "vendor": vendor})
+    client = MihanstorePartnerClient(get_browser_pool(), base_url=settings.MIHANSTORE_PARTNER_URL)
+    db = SessionLocal()
+    try:
+        result = run_async(PartnerOrderSync(client, vendor=vendor).sync(db, full=full))
+    finally:
+        db.close()
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    return result
+
+@celery_app.task(name="control.sync_vendors")
+def sync_vendors() -> Dict:
+    """job زمان‌بندی‌شده: سفارشات پنل‌ها و قیمت‌ها (با dedupe)"""
+    return {
+        "sync_partner_orders": submit_job("control.sync_partner_orders", {"vendor": "mihanstore"}),
+        "refresh_prices": submit_job("control.refresh_prices", priority=min(9, settings.JOB_DEFAULT_PRIORITY + 2))
+    }
@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import time
+import jdatetime
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.partner import PartnerOrder, SyncWatermark, SyncRun
+from services.catalog_sync import chunks, upsert_statement
+from core.config import settings
+
+# ستون‌هایی که تغییرشان یعنی سفارش باید به‌روزرسانی شود (مثلاً تغییر وضعیت)
+ORDER_COLUMNS = ("product", "commission_amount", "order_date", "tracking_code", "status")
+
+def order_row(vendor: str, order: Dict) -> Dict:
+    """ستون‌های PartnerOrder از یک ردیف پنل"""
+    return {
+        "vendor": vendor,
+        "order_id": str(order["order_id"]),
+        "product": order.get("product"),
+        "commission_amount": order.get("commission_amount", 0),
+        "order_date": order.get("date"),
+        "tracking_code": order.get("tracking_code"),
+        "status": order.get("status"),
+        "data": order
+    }
+
+def upsert_orders(db: Session, vendor: str, orders: List[Dict], chunk_size: int = 500) -> Dict[str, int]:
+    """
+    درج/به‌روزرسانی انبوه سفارشات یک vendor
+    فقط سفارش‌های جدید یا تغییرکرده نوشته می‌شوند.
+    """
+    by_id = {str(order["order_id"]): order_row(vendor, order) for order in orders}
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+    if not by_id:
+        return stats
+
+    existing = {}
+    for ids in chunks(list(by_id), 1000):
+        rows = db.execute(
+            select(PartnerOrder.order_id, *[getattr(PartnerOrder, column) for column in ORDER_COLUMNS]).where(
+                PartnerOrder.vendor == vendor,
+                PartnerOrder.order_id.in_(ids)
+            )
+        ).all()
+        existing.update({row[0]: tuple(row[1:]) for row in rows})
+
+    changed = []
+    for order_id, row in by_id.items():
+        current = existing.get(order_id)
+        if current is None:
+            stats["inserted"] += 1
+        elif current == tuple(row[column] for column in ORDER_COLUMNS):
+            stats["unchanged"] += 1
+            continue
+        else:
+            stats["updated"] += 1
+        changed.append(row)
+
+    statement = upsert_statement(db, PartnerOrder, ("vendor", "order_id"), (*ORDER_COLUMNS, "data"))
+    for chunk in chunks(changed, chunk_size):
+        db.execute(statement, chunk)
+    return stats
+
+def lookback_cutoff(order_date: Optional[str], days: int) -> Optional[str]:
+    """تاریخ شمسی days روز قبل از order_date (سفارش‌های قدیمی‌تر دوباره خوانده نمی‌شوند)"""
+    if not order_date:
+        return None
+    try:
+        year, month, day = (int(part) for part in order_date.split("-"))
+        return (jdatetime.date(year, month, day) - timedelta(days=days)).strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+class PartnerOrderSync:
+    """
+    همگام‌سازی افزایشی سفارشات پنل همکاری با watermark
+    صفحه‌ها از جدیدترین سفارش خوانده می‌شوند و با رسیدن به سفارش‌های قدیمی‌تر از
+    watermark منهای lookback_days (بازه‌ای که وضعیت سفارش ممکن است هنوز عوض شود) متوقف می‌شود.
+    """
+
+    def __init__(
+        self,
+        client,
+        vendor: str = "mihanstore",
+        lookback_days: Optional[int] = None,
+        max_pages: Optional[int] = None
+    ):
+        self.client = client
+        self.vendor = vendor
+        self.lookback_days = settings.PARTNER_SYNC_LOOKBACK_DAYS if lookback_days is None else lookback_days
+        self.max_pages = max_pages or settings.PARTNER_SYNC_MAX_PAGES
+
+    async def sync(self, db: Session, full: bool = False) -> Dict:
+        """
+        یک اجرای همگام‌سازی؛ با full=True همه صفحه‌ها (تا max_pages) خوانده می‌شوند
+        """
+        watermark = db.get(SyncWatermark, self.vendor) or SyncWatermark(vendor=self.vendor)
+        cutoff = None if full else lookback_cutoff(watermark.last_order_date, self.lookback_days)
+
+        run = SyncRun(vendor=self.vendor, full=full, started_at=datetime.utcnow())
+        db.add(run)
+        db.commit()
+        started = time.monotonic()
+
+        try:
+            stats = await self.client.fetch_dashboard_stats()
+
+            newest = (watermark.last_order_date or "", watermark.last_order_id or "")
+            for page_number in range(1, self.max_pages + 1):
+                orders = await self.client.fetch_orders_page(page_number)
+                run.pages += 1
+                if not orders:
+                    break
+
+                fresh = [order for order in orders if cutoff is None or order["date"] >= cutoff]
+                run.fetched += len(fresh)
+                counts = upsert_orders(db, self.vendor, fresh)
+                run.inserted += counts["inserted"]
+                run.updated += counts["updated"]
+                run.unchanged += counts["unchanged"]
+                newest = max([newest, *((order["date"], str(order["order_id"])) for order in fresh)])
+                db.commit()
+
+                # بقیه صفحه‌ها قدیمی‌تر از بازه بازبینی هستند
+                if len(fresh) < len(orders):
+                    break
+
+            watermark.last_order_date, watermark.last_order_id = newest[0] or None, newest[1] or None
+            watermark.stats = stats
+            db.merge(watermark)
+            run.success = True
+        except Exception as e:
+            db.rollback()
+            run.error = str(e)
+            print(f"Partner sync error ({self.vendor}): {e}")
+        finally:
+            run.finished_at = datetime.utcnow()
+            run.duration = time.monotonic() - started
+            db.add(run)
+            db.commit()
+
+        return sync_run_dict(run, watermark)
+
+def sync_run_dict(run: SyncRun, watermark: Optional[SyncWatermark] = None) -> Dict:
+    result = {
+        "success": run.success,
+        "vendor": run.vendor,
+        "full": run.full,
+        "pages": run.pages,
+        "fetched": run.fetched,
+        "inserted": run.inserted,
+        "updated": run.updated,
+        "unchanged": run.unchanged,
+        "duration": round(run.duration or 0, 3),
+        "started_at": run.started_at.isoformat() if run.started_at else None,
+        "error": run.error
+    }
+    if watermark is not None:
+        result["watermark"] = {
+            "last_order_id": watermark.last_order_id,
+            "last_order_date": watermark.last_order_date
+        }
+        result["stats"] = watermark.stats
+    return result
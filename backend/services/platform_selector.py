@@ -1,7 +1,16 @@
-from typing import List, Dict, Optional
+import asyncio
+import time
+from typing import List, Dict, Optional, Tuple, AsyncIterator
+from fastapi import Request
 from integrations.digikala import DigikalaIntegration
 from integrations.mihanstore import MihanstoreIntegration
 from integrations.torob import TorobIntegration
+from integrations.single_flight import SingleFlight
+from integrations.resilience import PlatformUnavailable
+from integrations.records import Listing, dump_listings, load_listings
+from services.search_cache import SearchCache
+from services.product_matching import ProductMatcher
+from services.scoring import ScoringEngine
 from core.config import settings
 
 class PlatformSelector:
@@ -9,89 +18,279 @@ class PlatformSelector:
     سیستم هوشمند انتخاب پلتفرم با بیشترین سود
     """
     
-    def __init__(self):
+    def __init__(self, cache: Optional[SearchCache] = None):
+        self.cache = cache
+        self.inflight = SingleFlight()
+        self.matcher = ProductMatcher(
+            query_threshold=settings.MATCH_QUERY_THRESHOLD,
+            cluster_threshold=settings.MATCH_CLUSTER_THRESHOLD
+        )
+        self.scoring = ScoringEngine(settings.SCORING_WEIGHTS)
         self.platforms = {
             "digikala": DigikalaIntegration(
                 affiliate_id=settings.DIGIKALA_AFFILIATE_ID,
-                commission_rate=0.12
+                commission_rate=0.12,
+                http_options=self.http_options("digikala")
             ),
             "mihanstore": MihanstoreIntegration(
                 partner_id=settings.MIHANSTORE_PARTNER_ID,
-                commission_rate=0.40
+                commission_rate=0.40,
+                http_options=self.http_options("mihanstore")
             ),
             "torob": TorobIntegration(
                 api_key=settings.TOROB_API_KEY,
-                commission_rate=0.10
+                commission_rate=0.10,
+                http_options=self.http_options("torob")
             )
         }
     
-    async def search_all_platforms(self, query: str) -> Dict[str, List[Dict]]:
-        """جستجو در تمام پلتفرم‌ها"""
-        results = {}
+    @staticmethod
+    def http_options(platform_name: str) -> Dict:
+        """تنظیمات connection pool هر پلتفرم (پیش‌فرض‌ها + override)"""
+        options = {
+            "timeout": settings.HTTP_TIMEOUT,
+            "http2": settings.HTTP_HTTP2,
+            "max_connections": settings.HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            "keepalive_expiry": settings.HTTP_KEEPALIVE_EXPIRY,
+            "breaker_window": settings.BREAKER_WINDOW,
+            "breaker_min_requests": settings.BREAKER_MIN_REQUESTS,
+            "breaker_error_threshold": settings.BREAKER_ERROR_THRESHOLD,
+            "breaker_open_seconds": settings.BREAKER_OPEN_SECONDS,
+            "hedge_percentile": settings.HEDGE_PERCENTILE,
+            "hedge_min_delay": settings.HEDGE_MIN_DELAY,
+            "retry_budget_ratio": settings.RETRY_BUDGET_RATIO,
+            "retry_budget_max": settings.RETRY_BUDGET_MAX,
+            "record_mode": settings.HTTP_RECORD_MODE,
+            "record_dir": settings.HTTP_RECORD_DIR
+        }
+        options.update(settings.PLATFORM_HTTP_OPTIONS.get(platform_name, {}))
+        return options
+    
+    def platform_timeout(self, platform_name: str) -> float:
+        """مهلت جستجوی هر پلتفرم (ثانیه)"""
+        return settings.PLATFORM_SEARCH_TIMEOUTS.get(platform_name, settings.PLATFORM_SEARCH_TIMEOUT)
+    
+    async def search_platform(self, platform_name: str, query: str) -> List[Listing]:
+        """جستجو در یک پلتفرم (از طریق کش در صورت وجود)"""
+        platform = self.platforms[platform_name]
+        if self.cache is None:
+            return await platform.search_product(query)
+        return await self.cache.get_or_fetch(
+            platform_name,
+            query,
+            lambda: platform.search_product(query),
+            encode=dump_listings,
+            decode=load_listings
+        )
+    
+    async def _search_platform(self, platform_name: str, query: str) -> Tuple[List[Listing], str]:
+        """جستجو در یک پلتفرم با مهلت اختصاصی"""
+        try:
+            products = await asyncio.wait_for(
+                self.search_platform(platform_name, query),
+                timeout=self.platform_timeout(platform_name)
+            )
+            return products, "ok"
+        except asyncio.TimeoutError:
+            print(f"Timeout searching {platform_name}")
+            return [], "timeout"
+        except PlatformUnavailable:
+            return [], "unavailable"
+        except Exception as e:
+            print(f"Error searching {platform_name}: {e}")
+            return [], "error"
+    
+    async def search_all_platforms_with_status(
+        self, query: str, budget: Optional[float] = None
+    ) -> Tuple[Dict[str, List[Listing]], Dict[str, str]]:
+        """
+        جستجوی همزمان در تمام پلتفرم‌ها
+        هر پلتفرم مهلت خودش را دارد و کل درخواست هم سقف زمانی دارد؛
+        پلتفرم‌هایی که به موقع جواب ندهند با وضعیت timeout برمی‌گردند.
+        """
+        budget = settings.SEARCH_TOTAL_BUDGET if budget is None else budget
+        tasks = {
+            name: asyncio.create_task(self._search_platform(name, query))
+            for name in self.platforms
+        }
         
-        for platform_name, platform in self.platforms.items():
-            try:
-                products = await platform.search_product(query)
-                results[platform_name] = products
-            except Exception as e:
-                print(f"Error searching {platform_name}: {e}")
-                results[platform_name] = []
+        done, pending = await asyncio.wait(tasks.values(), timeout=budget)
+        for task in pending:
+            task.cancel()
+        
+        results = {}
+        status = {}
+        for name, task in tasks.items():
+            if task in done:
+                results[name], status[name] = task.result()
+            else:
+                print(f"Search budget exceeded for {name}")
+                results[name], status[name] = [], "timeout"
         
+        return results, status
+    
+    async def search_all_platforms(self, query: str) -> Dict[str, List[Listing]]:
+        """جستجو در تمام پلتفرم‌ها"""
+        results, _ = await self.search_all_platforms_with_status(query)
         return results
     
-    def select_best_platform(self, product_title: str, platforms_data: Dict[str, List[Dict]]) -> Optional[Dict]:
+    def select_best_platform(self, product_title: str, platforms_data: Dict[str, List[Listing]]) -> Optional[Dict]:
         """
-        انتخاب بهترین پلتفرم بر اساس:
-        1. بیشترین کمیسیون
-        2. موجودی محصول
-        3. قیمت مناسب
+        انتخاب بهترین پلتفرم:
+        1. فقط listingهای همان محصول (گروه منطبق با عنوان)
+        2. امتیاز وزن‌دار کمیسیون، قیمت، موجودی، امتیاز کاربران و هزینه ارسال
         """
-        best_option = None
-        max_profit = 0
+        group = self.matcher.best_group(product_title, platforms_data)
+        if group is None:
+            return None
         
-        for platform_name, products in platforms_data.items():
-            if not products:
-                continue
-            
-            platform = self.platforms[platform_name]
-            
-            # پیدا کردن محصول مشابه
-            for product in products:
-                if product.get("in_stock", True):
-                    price = product.get("price", 0)
-                    commission = platform.calculate_commission(price)
-                    
-                    # محاسبه سود خالص
-                    profit = commission
-                    
-                    if profit > max_profit:
-                        max_profit = profit
-                        best_option = {
-                            "platform": platform_name,
-                            "product": product,
-                            "commission": commission,
-                            "commission_rate": platform.commission_rate,
-                            "profit": profit
-                        }
+        listings = group["listings"]
+        commission_rates = {name: platform.commission_rate for name, platform in self.platforms.items()}
+        ranking = self.scoring.rank(
+            [(platform_name, product) for platform_name, product, _ in listings],
+            commission_rates,
+            top_n=settings.RECOMMENDATION_TOP_N
+        )
+        if not ranking:
+            return None
+        
+        def option(ranked: Dict) -> Dict:
+            platform_name, product, similarity = listings[ranked["index"]]
+            return {
+                "platform": platform_name,
+                "product": product.to_dict(),
+                "commission": ranked["commission"],
+                "commission_rate": commission_rates[platform_name],
+                "profit": ranked["commission"],
+                "score": round(ranked["score"], 4),
+                "title_similarity": round(similarity, 3)
+            }
+        
+        best_option = option(ranking[0])
+        best_option["match_confidence"] = group["confidence"]
+        best_option["ranking"] = [option(ranked) for ranked in ranking]
+        best_option["matched_listings"] = [
+            {
+                "platform": platform_name,
+                "id": product.id,
+                "title": product.title,
+                "price": product.price,
+                "similarity": round(similarity, 3)
+            }
+            for platform_name, product, similarity in listings
+        ]
         
         return best_option
     
     async def compare_prices(self, product_title: str) -> Dict:
         """
         مقایسه قیمت در تمام پلتفرم‌ها
+        نتایج کامل کش می‌شوند؛ نتایج جزئی (timeout/خطا) نه.
+        مقایسه‌های همزمان برای یک عبارت روی یک اجرا سوار می‌شوند.
+        """
+        if self.cache is None:
+            fetch = lambda: self._compare_prices(product_title)
+        else:
+            fetch = lambda: self.cache.get_or_fetch(
+                "compare",
+                product_title,
+                lambda: self._compare_prices(product_title),
+                cache_if=lambda comparison: not comparison["partial"]
+            )
+        key = ("compare", SearchCache.normalize_query(product_title))
+        return await self.inflight.do(key, fetch)
+    
+    async def stream_compare_prices(
+        self, product_title: str, budget: Optional[float] = None
+    ) -> AsyncIterator[Dict]:
         """
-        all_results = await self.search_all_platforms(product_title)
+        نسخه جریانی compare_prices
+        نتیجه هر پلتفرم به محض آماده شدن با event=platform ارسال می‌شود
+        و در پایان مقایسه کامل با event=recommendation.
+        """
+        budget = settings.SEARCH_TOTAL_BUDGET if budget is None else budget
+        deadline = time.monotonic() + budget
+        tasks = {
+            asyncio.create_task(self._search_platform(name, product_title)): name
+            for name in self.platforms
+        }
+        results = {}
+        status = {}
+        pending = set(tasks)
+        
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    name = tasks[task]
+                    results[name], status[name] = task.result()
+                    yield {
+                        "event": "platform",
+                        "platform": name,
+                        "status": status[name],
+                        "results": [product.to_dict() for product in results[name]]
+                    }
+            
+            for task in pending:
+                name = tasks[task]
+                print(f"Search budget exceeded for {name}")
+                results[name], status[name] = [], "timeout"
+                yield {"event": "platform", "platform": name, "status": "timeout", "results": []}
+        finally:
+            # قطع اتصال کلاینت یا پایان مهلت: جستجوهای باقی‌مانده لغو شوند
+            for task in pending:
+                task.cancel()
+        
+        comparison = self._comparison(product_title, results, status)
+        yield {"event": "recommendation", **comparison}
+    
+    async def _compare_prices(self, product_title: str) -> Dict:
+        all_results, status = await self.search_all_platforms_with_status(product_title)
+        return self._comparison(product_title, all_results, status)
+    
+    def _comparison(
+        self, product_title: str, all_results: Dict[str, List[Listing]], status: Dict[str, str]
+    ) -> Dict:
+        """خروجی مقایسه از نتایج و وضعیت پلتفرم‌ها"""
+        all_results = {name: all_results[name] for name in self.platforms}
+        status = {name: status[name] for name in self.platforms}
         best = self.select_best_platform(product_title, all_results)
         
         return {
             "query": product_title,
-            "all_platforms": all_results,
+            "all_platforms": {
+                name: [product.to_dict() for product in products]
+                for name, products in all_results.items()
+            },
             "recommended": best,
             "total_platforms_checked": len(self.platforms),
-            "platforms_with_results": sum(1 for r in all_results.values() if r)
+            "platforms_with_results": sum(1 for r in all_results.values() if r),
+            "platform_status": status,
+            "timed_out": [name for name, s in status.items() if s == "timeout"],
+            "failed": [name for name, s in status.items() if s in ("error", "unavailable")],
+            "partial": any(s != "ok" for s in status.values())
         }
     
+    def health(self) -> Dict[str, Dict]:
+        """وضعیت circuit breaker و تأخیر هر پلتفرم"""
+        return {name: platform.health() for name, platform in self.platforms.items()}
+    
+    async def init_all(self):
+        """باز کردن سشن‌های تمام پلتفرم‌ها"""
+        for platform in self.platforms.values():
+            await platform.init_session()
+    
     async def close_all(self):
         """بستن تمام سشن‌ها"""
         for platform in self.platforms.values():
             await platform.close_session()
+
+def get_platform_selector(request: Request) -> PlatformSelector:
+    """PlatformSelector مشترک که در lifespan برنامه ساخته شده است"""
+    return request.app.state.platform_selector
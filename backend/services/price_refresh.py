@@ -0,0 +1,99 @@
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from core.database import run_sync_db
+from models.product import ProductListing
+from services.catalog_sync import sync_product_prices
+from core.config import settings
+
+class PriceRefreshService:
+    """
+    به‌روزرسانی انبوه قیمت محصولات کاتالوگ
+    شناسه‌ها dedupe می‌شوند، هر پلتفرم با محدودیت همزمانی خودش درخواست می‌گیرد
+    و فقط قیمت‌های تغییرکرده به صورت دسته‌ای در دیتابیس نوشته می‌شوند.
+    """
+    
+    def __init__(self, selector, batch_size: Optional[int] = None):
+        self.selector = selector
+        self.batch_size = batch_size or settings.PRICE_REFRESH_BATCH_SIZE
+    
+    def concurrency(self, platform_name: str) -> int:
+        return settings.PRICE_REFRESH_CONCURRENCY.get(platform_name, settings.PRICE_REFRESH_DEFAULT_CONCURRENCY)
+    
+    async def fetch_prices(self, refs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], float]:
+        """
+        دریافت قیمت برای (platform, platform_product_id)ها
+        خروجی فقط شامل قیمت‌هایی است که با موفقیت خوانده شده‌اند.
+        """
+        by_platform: Dict[str, List[str]] = {}
+        for platform_name, product_id in refs:
+            if platform_name in self.selector.platforms:
+                by_platform.setdefault(platform_name, []).append(product_id)
+        
+        async def fetch(platform_name: str, product_ids: List[str]):
+            platform = self.selector.platforms[platform_name]
+            return platform_name, await platform.get_prices(product_ids, self.concurrency(platform_name))
+        
+        results = await asyncio.gather(*[
+            fetch(platform_name, product_ids) for platform_name, product_ids in by_platform.items()
+        ])
+        
+        return {
+            (platform_name, product_id): price
+            for platform_name, prices in results
+            for product_id, price in prices.items()
+            if price is not None
+        }
+    
+    @staticmethod
+    def _batch(db: Session, last_id: int, platform: Optional[str], size: int) -> List[ProductListing]:
+        query = db.query(ProductListing).filter(ProductListing.id > last_id)
+        if platform:
+            query = query.filter(ProductListing.platform == platform)
+        return query.order_by(ProductListing.id).limit(size).all()
+    
+    @staticmethod
+    def _apply(db: Session, changes: List[Dict], product_ids: Iterable[int]):
+        if changes:
+            db.bulk_update_mappings(ProductListing, changes)
+            sync_product_prices(db, product_ids)
+            db.commit()
+        # جلوگیری از نگه داشتن اشیای دسته‌های قبلی در session
+        db.expunge_all()
+    
+    async def refresh(self, db: Union[Session, AsyncSession], platform: Optional[str] = None, limit: Optional[int] = None) -> Dict:
+        """
+        به‌روزرسانی قیمت listingها به صورت دسته‌ای
+        قیمت محصول برابر کمترین قیمت listingهای آن می‌شود.
+        با AsyncSession (routeهای API) کارهای دیتابیس از طریق run_sync روی همان event loop اجرا می‌شوند.
+        """
+        stats = {"checked": 0, "fetched": 0, "changed": 0, "failed": 0}
+        last_id = 0
+        
+        while limit is None or stats["checked"] < limit:
+            size = self.batch_size if limit is None else min(self.batch_size, limit - stats["checked"])
+            listings = await run_sync_db(db, self._batch, last_id, platform, size)
+            if not listings:
+                break
+            last_id = listings[-1].id
+            stats["checked"] += len(listings)
+            
+            refs = {listing.id: (listing.platform, listing.platform_product_id) for listing in listings}
+            prices = await self.fetch_prices(refs.values())
+            stats["fetched"] += len(prices)
+            stats["failed"] += len(set(refs.values()) - prices.keys())
+            
+            changes = []
+            product_ids = set()
+            for listing in listings:
+                price = prices.get(refs[listing.id])
+                if price is None or price == listing.price:
+                    continue
+                changes.append({"id": listing.id, "price": price})
+                product_ids.add(listing.product_id)
+            
+            await run_sync_db(db, self._apply, changes, product_ids)
+            stats["changed"] += len(changes)
+        
+        return stats
@@ -0,0 +1,217 @@
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+import re
+import zlib
+import numpy as np
+from integrations.records import Listing
+
+# یکسان‌سازی حروف عربی/فارسی و ارقام
+CHAR_MAP = str.maketrans({
+    "ي": "ی", "ى": "ی", "ئ": "ی", "ك": "ک", "ة": "ه", "ۀ": "ه",
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ؤ": "و",
+    **{chr(0x06F0 + i): str(i) for i in range(10)},  # ارقام فارسی
+    **{chr(0x0660 + i): str(i) for i in range(10)},  # ارقام عربی
+    "\u200c": "",  # نیم‌فاصله: «کتاب‌ها» و «کتابها» یکی شوند
+    "\u200d": "",
+    "\u0640": "",  # کشیده
+})
+DIACRITICS = re.compile(r"[\u064B-\u065F\u0670]")
+NON_WORD = re.compile(r"[^\w]+")
+NUMBER = re.compile(r"\d+")
+CAPACITY = re.compile(r"^(\d+)(gb|tb|mb)$")  # 128gb -> 128
+
+# واژه‌های نوع لوازم جانبی (نرمال‌شده)؛ «قاب ... Galaxy A54» و خود گوشی یک محصول نیستند
+ACCESSORY_TERMS = frozenset({
+    "قاب", "کاور", "کیف", "گلس", "محافظ", "برچسب", "اسکرین", "شارژر", "کابل", "اداپتور",
+    "هولدر", "پایه", "استند", "هندزفری", "هدفون", "ایرپاد", "بند", "لنز", "پاوربانک", "باتری"
+})
+
+def normalize_title(text: str) -> str:
+    """نرمال‌سازی عنوان فارسی برای مقایسه"""
+    text = DIACRITICS.sub("", (text or "").translate(CHAR_MAP).lower())
+    return " ".join(NON_WORD.sub(" ", text).replace("_", " ").split())
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """سه‌حرفی‌های هر کلمه (با فاصله در ابتدا و انتها)"""
+    grams = set()
+    for token in normalize_title(text).split():
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+class TitleKeys(NamedTuple):
+    """ویژگی‌های عنوان که باید بین اعضای یک گروه سازگار باشند"""
+    models: FrozenSet[str]  # توکن‌های حرف+عدد مثل a54، 5g
+    numbers: FrozenSet[str]  # ظرفیت/عددها مثل 128 (128gb هم 128 می‌شود)
+    kinds: FrozenSet[str]  # نوع لوازم جانبی (خالی برای خود کالا)
+
+def title_keys(text: str) -> TitleKeys:
+    models, numbers, kinds = set(), set(), set()
+    for token in normalize_title(text).split():
+        capacity = CAPACITY.match(token)
+        if token.isdigit() or capacity:
+            numbers.add(str(int(capacity.group(1) if capacity else token)))
+        elif NUMBER.search(token):
+            models.add(token)
+        elif token in ACCESSORY_TERMS:
+            kinds.add(token)
+    return TitleKeys(frozenset(models), frozenset(numbers), frozenset(kinds))
+
+def same_kind(a: TitleKeys, b: TitleKeys) -> bool:
+    """هر دو خود کالا، یا هر دو لوازم جانبی با حداقل یک نوع مشترک"""
+    return a.kinds == b.kinds or bool(a.kinds & b.kinds)
+
+def compatible(a: TitleKeys, b: TitleKeys) -> bool:
+    """
+    مدل و ظرفیت متناقض نباشند (یکی زیرمجموعه دیگری؛ عنوان کوتاه‌تر ممکن است ظرفیت را نگوید)
+    و هر دو از یک نوع باشند. A54 با A34 یا 128 با 256 یک محصول نیستند.
+    """
+    return (
+        same_kind(a, b)
+        and (a.models <= b.models or b.models <= a.models)
+        and (a.numbers <= b.numbers or b.numbers <= a.numbers)
+    )
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+def coverage(query: FrozenSet[str], title: FrozenSet[str]) -> float:
+    """چه بخشی از عبارت جستجو در عنوان آمده است"""
+    if not query:
+        return 0.0
+    return len(query & title) / len(query)
+
+class ProductMatcher:
+    """
+    خوشه‌بندی listingهای پلتفرم‌های مختلف که یک محصول واقعی هستند
+    جفت‌های کاندید با MinHash/LSH (برداری با NumPy) پیدا می‌شوند تا روی هزاران
+    کاندید هم سریع بماند، و سپس با Jaccard دقیق سه‌حرفی‌ها تأیید می‌شوند.
+    """
+    
+    PRIME = 4294967311  # اولین عدد اول بزرگ‌تر از 2^32
+    
+    def __init__(
+        self,
+        query_threshold: float = 0.5,
+        cluster_threshold: float = 0.5,
+        bands: int = 16,
+        rows: int = 2,
+        seed: int = 7
+    ):
+        self.query_threshold = query_threshold
+        self.cluster_threshold = cluster_threshold
+        self.bands = bands
+        self.rows = rows
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2**31, size=bands * rows, dtype=np.uint64)
+        self._b = rng.integers(0, 2**31, size=bands * rows, dtype=np.uint64)
+    
+    def signatures(self, grams: List[FrozenSet[str]]) -> np.ndarray:
+        """امضای MinHash همه عنوان‌ها در یک محاسبه برداری: (تعداد عنوان، bands*rows)"""
+        lengths = np.fromiter((max(1, len(g)) for g in grams), dtype=np.int64, count=len(grams))
+        hashes = np.fromiter(
+            (zlib.crc32(gram.encode("utf-8")) for g in grams for gram in (g or ("",))),
+            dtype=np.uint64,
+            count=int(lengths.sum())
+        )
+        permuted = (hashes[None, :] * self._a[:, None] + self._b[:, None]) % np.uint64(self.PRIME)
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        return np.minimum.reduceat(permuted, offsets, axis=1).T
+    
+    def cluster(self, grams: List[FrozenSet[str]], keys: Optional[List[TitleKeys]] = None) -> List[List[int]]:
+        """
+        خوشه‌بندی اندیس‌ها با نماینده: هر عضو باید با نماینده گروه (اولین عضو) مشابه و سازگار باشد.
+        اتصال زنجیره‌ای (single-link) نیست؛ در آن «قاب/گلس ... Galaxy A54» از طریق عنوان‌های
+        میانی به گروه خود گوشی می‌چسبیدند و هزاران listing یک گروه می‌شدند.
+        فقط نماینده‌ها در سطل‌های LSH ثبت می‌شوند، پس هر عنوان با نماینده‌های هم‌سطل خود مقایسه می‌شود.
+        """
+        groups: Dict[int, List[int]] = {}
+        if not grams:
+            return []
+        
+        signatures = self.signatures(grams)
+        blocks = [
+            np.ascontiguousarray(signatures[:, band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+        heads: List[Dict[bytes, List[int]]] = [defaultdict(list) for _ in range(self.bands)]
+        # ویژگی‌های تکراری زیادند: سازگاری هر جفت ویژگی یک بار حساب می‌شود
+        distinct: Dict[TitleKeys, int] = {}
+        key_ids = [distinct.setdefault(key, len(distinct)) for key in keys] if keys is not None else None
+        checked: Dict[Tuple[int, int], bool] = {}
+        
+        for i in range(len(grams)):
+            bucket_keys = [block[i].tobytes() for block in blocks]
+            candidates = {head for band, key in enumerate(bucket_keys) for head in heads[band].get(key, ())}
+            
+            best, best_score = None, 0.0
+            for head in sorted(candidates):
+                if key_ids is not None:
+                    pair = (key_ids[head], key_ids[i])
+                    if pair not in checked:
+                        checked[pair] = compatible(keys[head], keys[i])
+                    if not checked[pair]:
+                        continue
+                score = jaccard(grams[head], grams[i])
+                if score >= self.cluster_threshold and score > best_score:
+                    best, best_score = head, score
+            
+            if best is None:
+                groups[i] = [i]
+                for band, key in enumerate(bucket_keys):
+                    heads[band][key].append(i)
+            else:
+                groups[best].append(i)
+        
+        return list(groups.values())
+    
+    def match(self, query: str, platforms_data: Dict[str, List[Listing]]) -> List[Dict]:
+        """
+        گروه‌های محصول مرتبط با عبارت جستجو، مرتب‌شده بر اساس اطمینان
+        هر گروه: listingها (platform, product, similarity)، پلتفرم‌ها و confidence
+        """
+        query_grams = trigrams(query)
+        query_keys = title_keys(query)
+        listings: List[Tuple[str, Listing, float]] = []
+        grams: List[FrozenSet[str]] = []
+        keys: List[TitleKeys] = []
+        
+        for platform_name, products in platforms_data.items():
+            for product in products or []:
+                title_grams = trigrams(product.title or "")
+                similarity = coverage(query_grams, title_grams)
+                if similarity < self.query_threshold:
+                    continue
+                # «قاب گوشی سامسونگ Galaxy A54» عبارت «گوشی سامسونگ Galaxy A54» را کامل پوشش می‌دهد ولی همان کالا نیست
+                product_keys = title_keys(product.title or "")
+                if not same_kind(query_keys, product_keys):
+                    continue
+                listings.append((platform_name, product, similarity))
+                grams.append(title_grams)
+                keys.append(product_keys)
+        
+        groups = []
+        for members in self.cluster(grams, keys):
+            similarities = [listings[i][2] for i in members]
+            cohesion = 1.0
+            if len(members) > 1:
+                head = members[0]  # نماینده گروه
+                cohesion = sum(jaccard(grams[head], grams[i]) for i in members if i != head) / (len(members) - 1)
+            platforms = sorted({listings[i][0] for i in members})
+            groups.append({
+                "listings": [listings[i] for i in members],
+                "platforms": platforms,
+                "confidence": round(sum(similarities) / len(similarities) * (0.5 + 0.5 * cohesion), 3)
+            })
+        
+        # گروه‌هایی که در چند پلتفرم دیده شده‌اند اول می‌آیند (مقایسه واقعی ممکن است)؛
+        # بین آن‌ها اطمینان تعیین می‌کند، نه تعداد پلتفرم (گروه بزرگ‌تر لزوماً درست‌تر نیست)
+        groups.sort(key=lambda g: (len(g["platforms"]) > 1, g["confidence"]), reverse=True)
+        return groups
+    
+    def best_group(self, query: str, platforms_data: Dict[str, List[Listing]]) -> Optional[Dict]:
+        groups = self.match(query, platforms_data)
+        return groups[0] if groups else None
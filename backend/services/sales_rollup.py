@@ -0,0 +1,48 @@
+from typing import Dict, Iterable, Optional
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from models.order import DailySales, Order, OrderStatus
+
+ROLLUP_COLUMNS = ("orders", "cancelled_orders", "sales", "commission")
+
+def order_platform(platforms: Iterable[Optional[str]]) -> str:
+    """کلید پلتفرم سفارش: پلتفرم مشترک آیتم‌ها یا mixed"""
+    names = {name or "unknown" for name in platforms}
+    if not names:
+        return "unknown"
+    return names.pop() if len(names) == 1 else "mixed"
+
+def order_contribution(order: Order, status: Optional[OrderStatus] = None) -> Dict[str, float]:
+    """سهم یک سفارش (با وضعیت status) در ردیف روزانه‌اش"""
+    cancelled = (status or order.status) == OrderStatus.CANCELLED
+    return {
+        "orders": 1,
+        "cancelled_orders": 1 if cancelled else 0,
+        "sales": 0 if cancelled else order.total or 0,
+        "commission": 0 if cancelled else order.commission_amount or 0
+    }
+
+def status_change_delta(order: Order, old_status: OrderStatus, new_status: OrderStatus) -> Dict[str, float]:
+    """تفاوت سهم سفارش بعد از تغییر وضعیت (فقط لغو/برگشت از لغو اثر دارد)"""
+    old = order_contribution(order, old_status)
+    new = order_contribution(order, new_status)
+    return {column: new[column] - old[column] for column in ROLLUP_COLUMNS}
+
+def rollup_statement(db, order: Order, delta: Dict[str, float]):
+    """
+    INSERT ... ON CONFLICT (day, platform) DO UPDATE با جمع افزایشی
+    در همان تراکنش سفارش اجرا می‌شود؛ به‌روزرسانی‌های همزمان یک روز روی هم نمی‌افتند.
+    """
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(DailySales).values(
+        day=order.created_at.date(),
+        platform=order.fulfilled_by or "unknown",
+        **delta
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[DailySales.day, DailySales.platform],
+        set_={
+            **{column: getattr(DailySales, column) + stmt.excluded[column] for column in ROLLUP_COLUMNS},
+            "updated_at": func.now()
+        }
+    )
@@ -0,0 +1,80 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from integrations.records import Listing
+
+class ScoringEngine:
+    """
+    امتیازدهی برداری کاندیدها (NumPy)
+    هر ویژگی به بازه 0 تا 1 نرمال می‌شود و امتیاز نهایی میانگین وزن‌دار آن‌هاست.
+    برای قیمت و هزینه ارسال مقدار کمتر بهتر است.
+    """
+    
+    FEATURES = ("commission", "price", "stock", "rating", "shipping")
+    LOWER_IS_BETTER = ("price", "shipping")
+    
+    def __init__(self, weights: Optional[Dict[str, float]] = None, require_in_stock: bool = True):
+        weights = weights or {"commission": 1.0}
+        unknown = set(weights) - set(self.FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown scoring features: {', '.join(sorted(unknown))}")
+        self.weights = np.array([weights.get(f, 0.0) for f in self.FEATURES], dtype=np.float64)
+        if self.weights.sum() <= 0:
+            raise ValueError("At least one scoring weight must be positive")
+        self.require_in_stock = require_in_stock
+    
+    def features(self, candidates: Sequence[Tuple[str, Listing]], commission_rates: Dict[str, float]) -> Dict[str, np.ndarray]:
+        """ساخت آرایه ویژگی‌ها برای همه کاندیدها (platform, product)"""
+        count = len(candidates)
+        price = np.fromiter((p.price or 0 for _, p in candidates), dtype=np.float64, count=count)
+        rate = np.fromiter((commission_rates.get(name, 0) for name, _ in candidates), dtype=np.float64, count=count)
+        return {
+            "price": price,
+            "commission": price * rate,
+            "stock": np.fromiter((bool(p.in_stock) for _, p in candidates), dtype=np.float64, count=count),
+            "rating": np.fromiter((p.rating or 0 for _, p in candidates), dtype=np.float64, count=count),
+            "shipping": np.fromiter((p.shipping_cost or 0 for _, p in candidates), dtype=np.float64, count=count)
+        }
+    
+    def score(self, features: Dict[str, np.ndarray]) -> np.ndarray:
+        matrix = np.vstack([features[f] for f in self.FEATURES])
+        eligible = features["stock"] > 0 if self.require_in_stock else np.ones(matrix.shape[1], dtype=bool)
+        if not eligible.any():
+            return np.full(matrix.shape[1], -np.inf)
+        
+        # بازه نرمال‌سازی فقط از کاندیدهای قابل انتخاب گرفته می‌شود
+        low = matrix[:, eligible].min(axis=1, keepdims=True)
+        span = matrix[:, eligible].max(axis=1, keepdims=True) - low
+        normalized = np.divide(matrix - low, span, out=np.ones_like(matrix), where=span > 0)
+        
+        for i, feature in enumerate(self.FEATURES):
+            if feature in self.LOWER_IS_BETTER:
+                normalized[i] = 1 - normalized[i]
+        
+        scores = self.weights @ normalized / self.weights.sum()
+        return np.where(eligible, scores, -np.inf)
+    
+    def rank(
+        self,
+        candidates: Sequence[Tuple[str, Listing]],
+        commission_rates: Dict[str, float],
+        top_n: int = 5
+    ) -> List[Dict]:
+        """top-N کاندیدها به ترتیب امتیاز (کاندیدهای ناموجود حذف می‌شوند)"""
+        if not candidates:
+            return []
+        
+        features = self.features(candidates, commission_rates)
+        scores = self.score(features)
+        
+        top_n = min(top_n, len(candidates))
+        top = np.argpartition(-scores, top_n - 1)[:top_n]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        
+        return [
+            {
+                "index": int(i),
+                "score": float(scores[i]),
+                "commission": float(features["commission"][i])
+            }
+            for i in top if np.isfinite(scores[i])
+        ]
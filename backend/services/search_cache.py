@@ -0,0 +1,187 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import time
+
+class SearchCache:
+    """
+    کش دو لایه نتایج جستجو: LRU داخل پروسه جلوی Redis
+    ورودی‌های منقضی تا stale_ttl ثانیه دیگر هم برگردانده می‌شوند
+    و همزمان در پس‌زمینه تازه می‌شوند (stale-while-revalidate).
+    """
+    
+    def __init__(
+        self,
+        redis_client=None,
+        max_entries: int = 2048,
+        default_ttl: float = 300,
+        ttls: Optional[Dict[str, float]] = None,
+        stale_ttl: float = 600,
+        prefix: str = "search"
+    ):
+        self.redis = redis_client
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttls = ttls or {}
+        self.stale_ttl = stale_ttl
+        self.prefix = prefix
+        self._local: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._refreshing = set()
+        self._tasks = set()
+        self.counters = {
+            "hits": 0,
+            "local_hits": 0,
+            "redis_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "redis_errors": 0
+        }
+    
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return " ".join(query.strip().lower().split())
+    
+    def make_key(self, platform: str, query: str) -> str:
+        digest = hashlib.sha1(self.normalize_query(query).encode("utf-8")).hexdigest()
+        return f"{self.prefix}:{platform}:{digest}"
+    
+    def ttl(self, platform: str) -> float:
+        return self.ttls.get(platform, self.default_ttl)
+    
+    async def get_or_fetch(
+        self,
+        platform: str,
+        query: str,
+        fetch: Callable[[], Awaitable[Any]],
+        cache_if: Optional[Callable[[Any], bool]] = None,
+        encode: Optional[Callable[[Any], Any]] = None,
+        decode: Optional[Callable[[Any], Any]] = None
+    ) -> Any:
+        """
+        خواندن از کش یا اجرای fetch
+        cache_if تعیین می‌کند نتیجه قابل ذخیره هست یا نه (مثلاً نتایج جزئی ذخیره نشوند).
+        encode/decode مقدار را برای Redis به JSON و برعکس تبدیل می‌کنند
+        (لایه داخل پروسه خود شیء را نگه می‌دارد).
+        """
+        codec = (encode, decode)
+        key = self.make_key(platform, query)
+        entry = await self._get(key, platform, decode)
+        
+        if entry is not None:
+            stored_at, value = entry
+            age = time.time() - stored_at
+            ttl = self.ttl(platform)
+            if age < ttl:
+                self.counters["hits"] += 1
+                return value
+            if age < ttl + self.stale_ttl:
+                self.counters["stale_hits"] += 1
+                self._schedule_refresh(key, platform, fetch, cache_if, codec)
+                return value
+        
+        self.counters["misses"] += 1
+        value = await fetch()
+        if cache_if is None or cache_if(value):
+            await self._set(key, platform, value, encode)
+        return value
+    
+    def stats(self) -> Dict:
+        lookups = self.counters["hits"] + self.counters["stale_hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_ratio": (self.counters["hits"] + self.counters["stale_hits"]) / lookups if lookups else 0.0,
+            "local_entries": len(self._local),
+            "max_entries": self.max_entries,
+            "redis_enabled": self.redis is not None
+        }
+    
+    async def clear(self):
+        self._local.clear()
+        if self.redis is not None:
+            try:
+                keys = [key async for key in self.redis.scan_iter(match=f"{self.prefix}:*")]
+                if keys:
+                    await self.redis.delete(*keys)
+            except Exception as e:
+                self.counters["redis_errors"] += 1
+                print(f"Search cache redis error: {e}")
+    
+    def _schedule_refresh(self, key: str, platform: str, fetch, cache_if, codec):
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        task = asyncio.create_task(self._refresh(key, platform, fetch, cache_if, codec))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _refresh(self, key: str, platform: str, fetch, cache_if, codec):
+        try:
+            value = await fetch()
+            if cache_if is None or cache_if(value):
+                await self._set(key, platform, value, codec[0])
+            self.counters["refreshes"] += 1
+        except Exception as e:
+            print(f"Search cache refresh error ({platform}): {e}")
+        finally:
+            self._refreshing.discard(key)
+    
+    async def _get(self, key: str, platform: str, decode=None) -> Optional[Tuple[float, Any]]:
+        local = self._local.get(key)
+        if local is not None:
+            self._local.move_to_end(key)
+            if time.time() - local[0] < self.ttl(platform):
+                self.counters["local_hits"] += 1
+                return local
+        
+        if self.redis is None:
+            return local
+        
+        try:
+            raw = await self.redis.get(key)
+        except Exception as e:
+            self.counters["redis_errors"] += 1
+            print(f"Search cache redis error: {e}")
+            return local
+        
+        if raw is None:
+            return local
+        
+        # ممکن است پروسه دیگری نسخه تازه‌تری در Redis گذاشته باشد
+        data = json.loads(raw)
+        if local is not None and local[0] >= data["t"]:
+            return local
+        try:
+            entry = (data["t"], decode(data["v"]) if decode else data["v"])
+        except Exception as e:
+            # قالب قدیمی یا خراب: مثل miss
+            print(f"Search cache decode error: {e}")
+            return local
+        self.counters["redis_hits"] += 1
+        self._put_local(key, entry)
+        return entry
+    
+    async def _set(self, key: str, platform: str, value: Any, encode=None):
+        entry = (time.time(), value)
+        self._put_local(key, entry)
+        
+        if self.redis is None:
+            return
+        
+        try:
+            await self.redis.set(
+                key,
+                json.dumps({"t": entry[0], "v": encode(value) if encode else value}, ensure_ascii=False),
+                ex=int(self.ttl(platform) + self.stale_ttl)
+            )
+        except Exception as e:
+            self.counters["redis_errors"] += 1
+            print(f"Search cache redis error: {e}")
+    
+    def _put_local(self, key: str, entry: Tuple[float, Any]):
+        self._local[key] = entry
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
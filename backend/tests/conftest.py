@@ -0,0 +1,9 @@
+import os
+import sys
+
+# تست‌ها از پوشه backend اجرا می‌شوند: python -m pytest -q
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# صف و نتایج Celery در حافظه همین پروسه (بدون Redis)
+os.environ["CELERY_BROKER_URL"] = "memory://"
+os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
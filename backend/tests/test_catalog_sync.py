@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+import services.catalog_sync as catalog_sync
+from core.database import Base
+from integrations.records import Listing
+from models.product import Product, ProductListing
+import models.order  # noqa: F401  (mapper رابطه‌های Product)
+import models.user  # noqa: F401
+
+def batch(size: int = 20):
+    return [Listing(id=str(i), platform="torob", title=f"محصول {i}", price=1000 + i, url=f"https://torob.com/p/{i}") for i in range(size)]
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+def orphans(db: Session) -> int:
+    return db.scalar(select(func.count()).select_from(Product).where(~Product.listings.any()))
+
+def test_upsert_then_unchanged(engine):
+    with Session(engine) as db:
+        assert catalog_sync.upsert_items(db, "torob", batch()) == {"inserted": 20, "updated": 0, "unchanged": 0}
+    with Session(engine) as db:
+        items = batch()
+        items[0].price = 5
+        assert catalog_sync.upsert_items(db, "torob", items) == {"inserted": 0, "updated": 1, "unchanged": 19}
+        assert db.scalar(select(Product.price).join(Product.listings).where(ProductListing.platform_product_id == "0")) == 5
+
+def test_concurrent_syncs_do_not_orphan_products(engine, monkeypatch):
+    """
+    sync اول listingهای موجود را خوانده (هیچ) و قبل از درج، sync دوم همان دسته را کامل commit می‌کند
+    """
+    results = {}
+    original = catalog_sync.listing_from_item
+
+    def interleave(platform, item):
+        if "second" not in results:
+            results["second"] = None
+            with Session(engine) as other:
+                results["second"] = catalog_sync.upsert_items(other, "torob", batch())
+        return original(platform, item)
+
+    monkeypatch.setattr(catalog_sync, "listing_from_item", interleave)
+    with Session(engine) as db:
+        results["first"] = catalog_sync.upsert_items(db, "torob", batch())
+
+    assert results["second"] == {"inserted": 20, "updated": 0, "unchanged": 0}
+    assert results["first"] == {"inserted": 0, "updated": 20, "unchanged": 0}
+    with Session(engine) as db:
+        assert db.scalar(select(func.count()).select_from(Product)) == 20
+        assert db.scalar(select(func.count()).select_from(ProductListing)) == 20
+        assert orphans(db) == 0
@@ -0,0 +1,82 @@
+import asyncio
+import httpx
+from integrations.single_flight import SingleFlight
+from integrations.torob import TorobIntegration
+
+PAGE_SIZE = 5
+
+def page_items(page: int):
+    return [
+        {"web_client_absolute_url": f"/p/{page}-{i}", "name1": f"محصول {page}-{i}", "price": {"min": 10000}}
+        for i in range(PAGE_SIZE)
+    ]
+
+def torob(handler) -> TorobIntegration:
+    platform = TorobIntegration()
+    platform.session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return platform
+
+def test_closing_generator_cancels_lookahead_requests():
+    pages = {"started": [], "finished": []}
+
+    async def handler(request):
+        page = int(request.url.params["page"])
+        pages["started"].append(page)
+        await asyncio.sleep(0.05 * page)
+        pages["finished"].append(page)
+        return httpx.Response(200, json={"results": page_items(page)})
+
+    async def run():
+        platform = torob(handler)
+        items = [item async for item in platform.iter_search("گوشی", max_items=PAGE_SIZE, lookahead=3)]
+        started = list(pages["started"])
+        await asyncio.sleep(0.3)
+        in_flight = platform.inflight.in_flight()
+        await platform.close_session()
+        return items, started, in_flight
+
+    items, started, in_flight = asyncio.run(run())
+    assert len(items) == PAGE_SIZE
+    assert started == [1, 2, 3]
+    # صفحه‌های پیش‌خوانی‌شده بعد از توقف مصرف‌کننده کامل نمی‌شوند و درخواست تازه‌ای هم نمی‌رود
+    assert pages["finished"] == [1]
+    assert pages["started"] == started
+    assert in_flight == 0
+
+def test_single_flight_runs_while_a_waiter_remains():
+    calls = []
+
+    async def fetch():
+        calls.append("start")
+        await asyncio.sleep(0.05)
+        calls.append("done")
+        return 42
+
+    async def run():
+        flight = SingleFlight()
+        first = asyncio.create_task(flight.do("key", fetch))
+        second = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == 42
+    assert calls == ["start", "done"]
+
+def test_duplicate_only_page_does_not_end_search():
+    def handler(request):
+        page = int(request.url.params["page"])
+        if page > 3:
+            return httpx.Response(200, json={"results": []})
+        # صفحه 2 فقط آیتم‌های تکراری صفحه 1 را دارد
+        return httpx.Response(200, json={"results": page_items(1 if page == 2 else page)})
+
+    async def run():
+        platform = torob(handler)
+        try:
+            return [item.id async for item in platform.iter_search("گوشی", lookahead=2)]
+        finally:
+            await platform.close_session()
+
+    ids = asyncio.run(run())
+    assert ids == [f"1-{i}" for i in range(PAGE_SIZE)] + [f"3-{i}" for i in range(PAGE_SIZE)]
@@ -0,0 +1,74 @@
+import uuid
+import pytest
+from celery import states
+from celery.contrib.testing.worker import start_worker
+from core.celery import celery_app
+from services.jobs import ACTIVE_STATES, PROGRESS, QUEUED, cancel_job, dedupe_key, job_params, job_status, submit_job
+
+@celery_app.task(name="tests.report", bind=True)
+def report(self, run: str = "", fail: bool = False):
+    self.update_state(state=PROGRESS, meta={"stage": "report", "run": run})
+    if fail:
+        raise ValueError("boom")
+    return {"run": run}
+
+@pytest.fixture
+def run() -> str:
+    """پارامتر یکتا برای هر تست تا jobهای تست‌های دیگر dedupe نشوند"""
+    return uuid.uuid4().hex
+
+@pytest.fixture(scope="module")
+def worker():
+    with start_worker(celery_app, perform_ping_check=False):
+        yield
+
+def test_job_params_fill_task_defaults():
+    short = job_params("control.sync_partner_orders", {"vendor": "mihanstore"})
+    full = job_params("control.sync_partner_orders", {"vendor": "mihanstore", "full": False})
+    assert short == full == {"vendor": "mihanstore", "full": False}
+    assert dedupe_key("control.sync_partner_orders", short) == dedupe_key("control.sync_partner_orders", full)
+
+def test_submit_dedupes_active_job(run):
+    first = submit_job("tests.report", {"run": run})
+    assert not first["deduplicated"]
+    assert job_status(first["job_id"])["state"] == QUEUED
+    assert job_status(first["job_id"])["name"] == "tests.report"
+
+    again = submit_job("tests.report", {"run": run, "fail": False})
+    assert again == {"job_id": first["job_id"], "deduplicated": True}
+
+    other = submit_job("tests.report", {"run": run, "fail": True})
+    assert other["job_id"] != first["job_id"]
+
+def test_finished_job_is_not_reused(run):
+    first = submit_job("tests.report", {"run": run})
+    celery_app.backend.store_result(first["job_id"], {"run": run}, states.SUCCESS)
+    assert states.SUCCESS not in ACTIVE_STATES
+
+    second = submit_job("tests.report", {"run": run})
+    assert not second["deduplicated"]
+    assert second["job_id"] != first["job_id"]
+    assert submit_job("tests.report", {"run": run})["job_id"] == second["job_id"]
+
+def test_cancelled_job_is_not_reused(run):
+    first = submit_job("tests.report", {"run": run})
+    assert cancel_job(first["job_id"])["state"] == states.REVOKED
+    assert submit_job("tests.report", {"run": run})["job_id"] != first["job_id"]
+
+def test_worker_runs_job_to_success(worker, run):
+    job = submit_job("tests.report", {"run": run})
+    celery_app.AsyncResult(job["job_id"]).get(timeout=10)
+
+    status = job_status(job["job_id"])
+    assert status["state"] == states.SUCCESS
+    assert status["result"] == {"run": run}
+    assert not submit_job("tests.report", {"run": run})["deduplicated"]
+
+def test_worker_reports_failure(worker, run):
+    job = submit_job("tests.report", {"run": run, "fail": True})
+    with pytest.raises(ValueError):
+        celery_app.AsyncResult(job["job_id"]).get(timeout=10)
+
+    status = job_status(job["job_id"])
+    assert status["state"] == states.FAILURE
+    assert status["error"] == "boom"
@@ -0,0 +1,95 @@
+import asyncio
+import httpx
+from integrations.resilience import CircuitBreaker, PlatformError, PlatformUnavailable
+from integrations.torob import TorobIntegration
+
+BREAKER = {"breaker_min_requests": 3, "breaker_window": 10, "breaker_error_threshold": 0.5}
+
+def torob(handler) -> TorobIntegration:
+    platform = TorobIntegration(http_options=BREAKER)
+    platform.session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return platform
+
+async def attempts(platform: TorobIntegration, count: int):
+    errors = []
+    for _ in range(count):
+        try:
+            await platform.search_product("گوشی")
+        except PlatformError as e:
+            errors.append(e)
+    await platform.close_session()
+    return errors
+
+def test_repeated_403_opens_circuit():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(403, text="Access denied")
+
+    platform = torob(handler)
+    errors = asyncio.run(attempts(platform, 5))
+    assert len(errors) == 5
+    assert platform.breaker.state == CircuitBreaker.OPEN
+    assert len(requests) == 3
+    assert all(isinstance(e, PlatformUnavailable) for e in errors[3:])
+
+def test_parse_errors_count_as_failures():
+    platform = torob(lambda request: httpx.Response(200, text="<html>captcha</html>"))
+    errors = asyncio.run(attempts(platform, 4))
+    assert len(errors) == 4
+    assert "parse error" in str(errors[0])
+    assert platform.breaker.counters["failures"] == 3
+    assert platform.breaker.counters["successes"] == 0
+    assert platform.breaker.state == CircuitBreaker.OPEN
+
+def test_not_found_is_not_a_failure():
+    platform = torob(lambda request: httpx.Response(404))
+
+    async def run():
+        try:
+            return [await platform.get_product_details(str(i)) for i in range(4)]
+        finally:
+            await platform.close_session()
+
+    assert asyncio.run(run()) == [None] * 4
+    assert platform.breaker.state == CircuitBreaker.CLOSED
+    assert platform.breaker.counters["failures"] == 0
+
+def slow_torob() -> TorobIntegration:
+    async def handler(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200, json={"results": []})
+
+    return torob(handler)
+
+def test_cancelled_requests_are_not_failures():
+    platform = slow_torob()
+
+    async def run():
+        for _ in range(5):
+            try:
+                await asyncio.wait_for(platform.get(f"{platform.api_base}/search/"), timeout=0.01)
+            except asyncio.TimeoutError:
+                pass
+        await platform.close_session()
+
+    asyncio.run(run())
+    assert platform.breaker.state == CircuitBreaker.CLOSED
+    assert platform.breaker.counters["failures"] == 0
+
+def test_cancelled_half_open_probe_is_released():
+    platform = slow_torob()
+    platform.breaker._open()
+    platform.breaker.opened_at -= platform.breaker.open_seconds
+
+    async def run():
+        try:
+            await asyncio.wait_for(platform.get(f"{platform.api_base}/search/"), timeout=0.01)
+        except asyncio.TimeoutError:
+            pass
+        await platform.close_session()
+
+    asyncio.run(run())
+    assert platform.breaker.state == CircuitBreaker.HALF_OPEN
+    assert platform.breaker.allow()
@@ -0,0 +1,63 @@
+from integrations.records import Listing
+from services.product_matching import ProductMatcher, compatible, title_keys, trigrams
+
+PHONE = "گوشی سامسونگ Galaxy A54"
+
+def listing(platform: str, title: str) -> Listing:
+    return Listing(id=title, platform=platform, title=title, price=1)
+
+def test_title_keys():
+    keys = title_keys("گوشی موبایل سامسونگ مدل Galaxy A54 5G ظرفیت ۱۲۸ گیگابایت")
+    assert keys.models == {"a54", "5g"}
+    assert keys.numbers == {"128"}
+    assert not keys.kinds
+    assert title_keys("Galaxy A54 256GB").numbers == {"256"}
+    assert title_keys("قاب سیلیکونی Galaxy A54").kinds == {"قاب"}
+
+def test_compatible():
+    assert compatible(title_keys("گوشی سامسونگ Galaxy A54"), title_keys("گوشی سامسونگ Galaxy A54 ظرفیت 128 گیگابایت"))
+    assert not compatible(title_keys("گوشی سامسونگ Galaxy A54"), title_keys("گوشی سامسونگ Galaxy A34"))
+    assert not compatible(title_keys("Galaxy A54 128GB"), title_keys("Galaxy A54 256GB"))
+    assert not compatible(title_keys(PHONE), title_keys("قاب گوشی سامسونگ Galaxy A54"))
+    assert compatible(title_keys("گلس گوشی Galaxy A54"), title_keys("گلس محافظ صفحه Galaxy A54"))
+
+def test_accessories_do_not_join_phone_group():
+    titles = [
+        "گوشی موبایل سامسونگ مدل Galaxy A54 ظرفیت 128 گیگابایت",
+        "گوشی سامسونگ Galaxy A54 ظرفیت 128 گیگابایت",
+        "گوشی موبایل سامسونگ Galaxy A54 128GB",
+        "قاب گوشی سامسونگ Galaxy A54",
+        "قاب سیلیکونی سامسونگ Galaxy A54",
+        "گلس گوشی سامسونگ Galaxy A54",
+        "گلس محافظ صفحه سامسونگ Galaxy A54",
+        "گوشی سامسونگ Galaxy A34 ظرفیت 128 گیگابایت",
+    ]
+    clusters = ProductMatcher().cluster([trigrams(t) for t in titles], [title_keys(t) for t in titles])
+    phone = next(members for members in clusters if 0 in members)
+    assert sorted(phone) == [0, 1, 2]
+    for members in clusters:
+        if members is not phone:
+            assert not set(members) & {0, 1, 2}
+
+def test_best_group_is_the_phone():
+    platforms_data = {
+        "digikala": [listing("digikala", "گوشی موبایل سامسونگ مدل Galaxy A54 ظرفیت 128 گیگابایت"), listing("digikala", "قاب گوشی سامسونگ Galaxy A54")],
+        "torob": [listing("torob", "گوشی سامسونگ Galaxy A54 ظرفیت 128 گیگابایت"), listing("torob", "گلس گوشی سامسونگ Galaxy A54")],
+        "mihanstore": [listing("mihanstore", "قاب گوشی سامسونگ Galaxy A54"), listing("mihanstore", "گلس گوشی سامسونگ Galaxy A54")],
+    }
+    group = ProductMatcher().best_group(PHONE, platforms_data)
+    assert group["platforms"] == ["digikala", "torob"]
+    assert all(not title_keys(product.title).kinds for _, product, _ in group["listings"])
+
+def test_no_chaining_on_large_catalog():
+    models = [f"Galaxy A{n}" for n in (14, 24, 34, 54)] + [f"Galaxy S{n}" for n in (22, 23)]
+    templates = [
+        "گوشی موبایل سامسونگ مدل {m} ظرفیت {c} گیگابایت", "گوشی سامسونگ {m} ظرفیت {c} گیگابایت",
+        "قاب گوشی سامسونگ {m}", "قاب سیلیکونی سامسونگ {m}", "گلس گوشی سامسونگ {m}", "گلس محافظ صفحه سامسونگ {m}",
+    ]
+    titles = [t.format(m=m, c=c) for m in models for c in (128, 256) for t in templates] * 5
+    keys = [title_keys(t) for t in titles]
+    clusters = ProductMatcher().cluster([trigrams(t) for t in titles], keys)
+    assert max(len(members) for members in clusters) <= 40
+    for members in clusters:
+        assert all(compatible(keys[members[0]], keys[i]) for i in members)
@@ -0,0 +1,67 @@
+import importlib
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+import core.database
+from core.database import Base, get_async_db
+from core.query_stats import QUERY_COUNT_HEADER, assert_query_budget, instrument_engine
+from models.order import Order, OrderItem
+from models.product import Product
+from models.user import User
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    """اپ اصلی (با middleware شمارش SQL) روی SQLite به جای PostgreSQL"""
+    path = tmp_path_factory.mktemp("db") / "shop.db"
+    engine = create_engine(f"sqlite:///{path}")
+    with pytest.MonkeyPatch.context() as patch:
+        # main هنگام import جدول‌ها را روی core.database.engine می‌سازد
+        patch.setattr(core.database, "engine", engine)
+        main = importlib.import_module("main")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(id=1, email="a@dotshop.ir", phone="09120000000", full_name="علی"))
+        db.add_all([Product(id=i, title=f"محصول {i}", price=1000 * i) for i in range(1, 6)])
+        db.add(Order(
+            id=1,
+            order_number="DS-10000001",
+            user_id=1,
+            subtotal=15000,
+            total=15000,
+            items=[
+                OrderItem(product_id=i, product_name=f"محصول {i}", quantity=1, unit_price=1000 * i, total_price=1000 * i)
+                for i in range(1, 6)
+            ]
+        ))
+        db.commit()
+    engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    instrument_engine(async_engine.sync_engine)
+    sessions = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+    async def get_test_db():
+        async with sessions() as db:
+            yield db
+
+    main.app.dependency_overrides[get_async_db] = get_test_db
+    try:
+        yield TestClient(main.app)
+    finally:
+        main.app.dependency_overrides.pop(get_async_db, None)
+
+def test_order_detail_query_budget(client):
+    response = client.get("/api/orders/1")
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 5
+    # سفارش + یک selectin برای همه اقلام؛ N+1 روی اقلام این عدد را با تعداد اقلام بالا می‌برد
+    assert_query_budget(response, 2)
+
+def test_query_budget_failure_message(client):
+    response = client.get("/api/orders/1")
+    assert int(response.headers[QUERY_COUNT_HEADER]) > 1
+    with pytest.raises(AssertionError, match="GET /api/orders/1"):
+        assert_query_budget(response, 1)
@@ -0,0 +1,48 @@
+-- Move platform listings out of products.platforms (JSON) into an indexed table.
+-- Safe to re-run: existing (platform, platform_product_id) pairs are skipped.
+
+CREATE TABLE IF NOT EXISTS product_listings (
+    id SERIAL PRIMARY KEY,
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    platform VARCHAR NOT NULL,
+    platform_product_id VARCHAR NOT NULL,
+    title VARCHAR,
+    price DOUBLE PRECISION,
+    in_stock BOOLEAN DEFAULT TRUE,
+    url VARCHAR,
+    affiliate_url VARCHAR,
+    image VARCHAR,
+    data JSON,
+    created_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc'),
+    updated_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc'),
+    CONSTRAINT uq_product_listings_platform_product UNIQUE (platform, platform_product_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_product_listings_id ON product_listings (id);
+CREATE INDEX IF NOT EXISTS ix_product_listings_product_id ON product_listings (product_id);
+
+INSERT INTO product_listings (
+    product_id, platform, platform_product_id, title, price, in_stock,
+    url, affiliate_url, image, data, created_at, updated_at
+)
+SELECT
+    p.id,
+    listing.key,
+    listing.value->>'id',
+    COALESCE(listing.value->>'title', p.title),
+    COALESCE((listing.value->>'price')::DOUBLE PRECISION, p.price),
+    COALESCE((listing.value->>'in_stock')::BOOLEAN, p.in_stock, TRUE),
+    listing.value->>'url',
+    COALESCE(listing.value->>'affiliate_url', listing.value->>'url'),
+    COALESCE(listing.value->>'image', p.main_image),
+    listing.value,
+    COALESCE(p.created_at, now() AT TIME ZONE 'utc'),
+    COALESCE(p.updated_at, now() AT TIME ZONE 'utc')
+FROM products p
+CROSS JOIN LATERAL json_each(p.platforms) AS listing
+WHERE p.platforms IS NOT NULL
+  AND json_typeof(p.platforms) = 'object'
+  AND json_typeof(listing.value) = 'object'
+  AND listing.value->>'id' IS NOT NULL
+ORDER BY p.id
+ON CONFLICT (platform, platform_product_id) DO NOTHING;
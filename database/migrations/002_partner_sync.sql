@@ -0,0 +1,47 @@
+-- Incremental partner-panel sync: orders, per-vendor watermark and run log.
+-- Safe to re-run.
+
+CREATE TABLE IF NOT EXISTS partner_orders (
+    id SERIAL PRIMARY KEY,
+    vendor VARCHAR NOT NULL,
+    order_id VARCHAR NOT NULL,
+    product VARCHAR,
+    commission_amount INTEGER DEFAULT 0,
+    order_date VARCHAR,
+    tracking_code VARCHAR,
+    status VARCHAR,
+    data JSON,
+    created_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc'),
+    updated_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc'),
+    CONSTRAINT uq_partner_orders_vendor_order UNIQUE (vendor, order_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_partner_orders_id ON partner_orders (id);
+CREATE INDEX IF NOT EXISTS ix_partner_orders_order_date ON partner_orders (order_date);
+
+CREATE TABLE IF NOT EXISTS sync_watermarks (
+    vendor VARCHAR PRIMARY KEY,
+    last_order_id VARCHAR,
+    last_order_date VARCHAR,
+    stats JSON,
+    updated_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc')
+);
+
+CREATE TABLE IF NOT EXISTS sync_runs (
+    id SERIAL PRIMARY KEY,
+    vendor VARCHAR NOT NULL,
+    "full" BOOLEAN DEFAULT FALSE,
+    success BOOLEAN DEFAULT FALSE,
+    error VARCHAR,
+    pages INTEGER DEFAULT 0,
+    fetched INTEGER DEFAULT 0,
+    inserted INTEGER DEFAULT 0,
+    updated INTEGER DEFAULT 0,
+    unchanged INTEGER DEFAULT 0,
+    started_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc'),
+    finished_at TIMESTAMP,
+    duration DOUBLE PRECISION
+);
+
+CREATE INDEX IF NOT EXISTS ix_sync_runs_id ON sync_runs (id);
+CREATE INDEX IF NOT EXISTS ix_sync_runs_vendor ON sync_runs (vendor);
@@ -0,0 +1,49 @@
+-- Daily sales rollup per (day, platform) for the dashboard, maintained by the API
+-- on order create / status change. Safe to re-run: the backfill recomputes every
+-- day from orders (run it while order writes are paused).
+
+CREATE TABLE IF NOT EXISTS daily_sales (
+    day DATE NOT NULL,
+    platform VARCHAR NOT NULL,
+    orders INTEGER NOT NULL DEFAULT 0,
+    cancelled_orders INTEGER NOT NULL DEFAULT 0,
+    sales DOUBLE PRECISION NOT NULL DEFAULT 0,
+    commission DOUBLE PRECISION NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc'),
+    PRIMARY KEY (day, platform)
+);
+
+-- Rollup key of older orders: the shared platform of their items, otherwise 'mixed'
+UPDATE orders o
+SET fulfilled_by = item_platforms.platform
+FROM (
+    SELECT
+        order_id,
+        CASE WHEN COUNT(DISTINCT COALESCE(platform, 'unknown')) = 1
+             THEN MIN(COALESCE(platform, 'unknown'))
+             ELSE 'mixed'
+        END AS platform
+    FROM order_items
+    GROUP BY order_id
+) item_platforms
+WHERE o.id = item_platforms.order_id
+  AND o.fulfilled_by IS NULL;
+
+INSERT INTO daily_sales (day, platform, orders, cancelled_orders, sales, commission, updated_at)
+SELECT
+    o.created_at::date,
+    COALESCE(o.fulfilled_by, 'unknown'),
+    COUNT(*),
+    COUNT(*) FILTER (WHERE o.status = 'CANCELLED'),
+    COALESCE(SUM(o.total) FILTER (WHERE o.status <> 'CANCELLED'), 0),
+    COALESCE(SUM(o.commission_amount) FILTER (WHERE o.status <> 'CANCELLED'), 0),
+    now() AT TIME ZONE 'utc'
+FROM orders o
+WHERE o.created_at IS NOT NULL
+GROUP BY 1, 2
+ON CONFLICT (day, platform) DO UPDATE SET
+    orders = EXCLUDED.orders,
+    cancelled_orders = EXCLUDED.cancelled_orders,
+    sales = EXCLUDED.sales,
+    commission = EXCLUDED.commission,
+    updated_at = EXCLUDED.updated_at;
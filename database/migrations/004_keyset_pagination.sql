@@ -0,0 +1,11 @@
+-- Composite indexes for keyset (cursor) pagination of order and product listings.
+-- Safe to re-run. CONCURRENTLY avoids locking writes; run outside a transaction.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_orders_created_at_id ON orders (created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_orders_user_created_at_id ON orders (user_id, created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_orders_status_created_at_id ON orders (status, created_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_category_id_id ON products (category_id, id);
+
+-- Estimated totals (count=estimated) read planner statistics
+ANALYZE orders;
+ANALYZE products;
@@ -9,7 +9,7 @@ sys.path.append('..')
 
 from backend.integrations.digikala import DigikalaIntegration
 from backend.core.database import SessionLocal
-from backend.models.product import Product
+from backend.services.catalog_sync import upsert_items
 import os
 from dotenv import load_dotenv
 
@@ -27,7 +27,8 @@ async def import_products(query: str, limit: int = 50):
     )
     
     try:
-        results = await digikala.search_product(query)
+        # همه صفحات تا سقف limit (چند صفحه همزمان پیش‌خوانی می‌شود)
+        results = [item async for item in digikala.iter_search(query, max_items=limit)]
         
         if not results:
             print("❌ محصولی یافت نشد")
@@ -36,35 +37,13 @@ async def import_products(query: str, limit: int = 50):
         print(f"✅ {len(results)} محصول پیدا شد")
         
         db = SessionLocal()
-        imported = 0
+        try:
+            stats = upsert_items(db, 'digikala', results)
+        finally:
+            db.close()
         
-        for item in results[:limit]:
-            # بررسی وجود محصول
-            existing = db.query(Product).filter(
-                Product.platforms.contains({'digikala': {'id': item['id']}})
-            ).first()
-            
-            if existing:
-                print(f"⏭️  قبلاً وجود دارد: {item['title'][:50]}...")
-                continue
-            
-            # ایجاد محصول جدید
-            product = Product(
-                title=item['title'],
-                price=item['price'],
-                main_image=item['image'],
-                in_stock=item.get('in_stock', True),
-                platforms={'digikala': item}
-            )
-            
-            db.add(product)
-            imported += 1
-            print(f"✅ اضافه شد: {item['title'][:50]}...")
-        
-        db.commit()
-        db.close()
-        
-        print(f"\n✨ {imported} محصول جدید اضافه شد")
+        print(f"\n✨ {stats['inserted']} محصول جدید اضافه شد")
+        print(f"🔄 {stats['updated']} به‌روزرسانی، ⏭️  {stats['unchanged']} بدون تغییر")
         
     finally:
         await digikala.close_session()
@@ -9,7 +9,7 @@ sys.path.append('..')
 
 from backend.integrations.mihanstore import MihanstoreIntegration
 from backend.core.database import SessionLocal
-from backend.models.product import Product
+from backend.services.catalog_sync import upsert_items
 import os
 from dotenv import load_dotenv
 
@@ -24,7 +24,8 @@ async def import_products(query: str, limit: int = 50):
     )
     
     try:
-        results = await mihanstore.search_product(query)
+        # همه صفحات تا سقف limit (چند صفحه همزمان پیش‌خوانی می‌شود)
+        results = [item async for item in mihanstore.iter_search(query, max_items=limit)]
         
         if not results:
             print("❌ محصولی یافت نشد")
@@ -33,31 +34,13 @@ async def import_products(query: str, limit: int = 50):
         print(f"✅ {len(results)} محصول پیدا شد (کمیسیون 40%)")
         
         db = SessionLocal()
-        imported = 0
+        try:
+            stats = upsert_items(db, 'mihanstore', results)
+        finally:
+            db.close()
         
-        for item in results[:limit]:
-            existing = db.query(Product).filter(
-                Product.platforms.contains({'mihanstore': {'id': item['id']}})
-            ).first()
-            
-            if existing:
-                continue
-            
-            product = Product(
-                title=item['title'],
-                price=item['price'],
-                main_image=item['image'],
-                platforms={'mihanstore': item}
-            )
-            
-            db.add(product)
-            imported += 1
-            print(f"✅ {item['title'][:50]}... - کمیسیون: {item['commission']:,} تومان")
-        
-        db.commit()
-        db.close()
-        
-        print(f"\n✨ {imported} محصول جدید اضافه شد")
+        print(f"\n✨ {stats['inserted']} محصول جدید اضافه شد")
+        print(f"🔄 {stats['updated']} به‌روزرسانی، ⏭️  {stats['unchanged']} بدون تغییر")
         
     finally:
         await mihanstore.close_session()